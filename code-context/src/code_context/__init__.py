@@ -5,6 +5,7 @@ Code Context: A library for chunking, embedding, and indexing code.
 from .chunking import (
     chunk_document,
     chunk_document_ast,
+    chunk_document_bytes,
     convert_ipynb_to_python,
 )
 from .embedding import (
@@ -31,6 +32,7 @@ from .main import (
 __all__ = [
     "chunk_document",
     "chunk_document_ast",
+    "chunk_document_bytes",
     "convert_ipynb_to_python",
     "get_embedding",
     "get_embeddings",
@@ -2,8 +2,10 @@
 This module provides functionality for chunking documents, including AST-based chunking for code.
 """
 
+import itertools
 import os
-from typing import Dict, Any, List, Optional
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Union
 
 import nbformat
 from nbconvert.exporters import ScriptExporter
@@ -96,6 +98,35 @@ EXTENSION_TO_LANGUAGE = {
     ".sc": "scala",
 }
 
+# tree-sitter language names that share node types with a SPLITTABLE_NODE_TYPES key
+LANGUAGE_ALIASES = {
+    "c_sharp": "csharp",
+    "tsx": "typescript",
+}
+
+# Splittable node types as frozensets, keyed by both canonical and tree-sitter
+# language names, so chunking needs a single lookup and O(1) membership tests
+FROZEN_SPLITTABLE = {lang: frozenset(types) for lang, types in SPLITTABLE_NODE_TYPES.items()}
+FROZEN_SPLITTABLE.update(
+    {alias: FROZEN_SPLITTABLE[lang] for alias, lang in LANGUAGE_ALIASES.items()}
+)
+
+
+# Parsers are reused across files; tree-sitter parsers are not thread-safe, so
+# each thread keeps its own language -> parser cache.
+_parser_cache = threading.local()
+
+
+def _get_cached_parser(ts_language: str):
+    """Return this thread's parser for a language, creating it on first use."""
+    parsers = getattr(_parser_cache, "parsers", None)
+    if parsers is None:
+        parsers = _parser_cache.parsers = {}
+    parser = parsers.get(ts_language)
+    if parser is None:
+        parser = parsers[ts_language] = get_parser(ts_language)
+    return parser
+
 
 def convert_ipynb_to_python(ipynb_content: str) -> str:
     """Converts the content of an .ipynb file to a Python string."""
@@ -113,11 +144,7 @@ def get_language_from_filepath(filepath: str) -> Optional[str]:
 
 def normalize_language_name(lang: str) -> str:
     """Normalize tree-sitter language name to match SPLITTABLE_NODE_TYPES keys."""
-    lang_map = {
-        "c_sharp": "csharp",
-        "tsx": "typescript",
-    }
-    return lang_map.get(lang, lang)
+    return LANGUAGE_ALIASES.get(lang, lang)
 
 
 def chunk_document_ast(
@@ -136,7 +163,7 @@ def chunk_document_ast(
 
     try:
         # Get the parser for this language
-        parser = get_parser(ts_language)
+        parser = _get_cached_parser(ts_language)
         tree = parser.parse(document)
 
         if tree.root_node() is None:
@@ -144,15 +171,17 @@ def chunk_document_ast(
             return chunk_document(document, chunk_size, chunk_overlap)
 
         # Get the splittable node types for this language
-        normalized_lang = normalize_language_name(ts_language)
-        splittable_types = SPLITTABLE_NODE_TYPES.get(normalized_lang, [])
+        splittable_types = FROZEN_SPLITTABLE.get(ts_language)
 
         if not splittable_types:
             # No node types defined for this language, fall back
             return chunk_document(document, chunk_size, chunk_overlap)
 
+        # Encode once; AST extraction and refinement both work on these bytes
+        code_bytes = document.encode("utf-8")
+
         # Extract chunks based on AST nodes
-        chunks = extract_chunks_from_ast(tree, document, splittable_types)
+        chunks = extract_chunks_from_ast(tree, code_bytes, splittable_types)
 
         # If no chunks found, fall back to character-based
         if not chunks:
@@ -160,7 +189,7 @@ def chunk_document_ast(
 
         # Refine chunks that are too large
         refined_chunks = refine_large_chunks(
-            chunks, document, chunk_size, chunk_overlap
+            chunks, code_bytes, chunk_size, chunk_overlap
         )
 
         return refined_chunks
@@ -174,50 +203,50 @@ def chunk_document_ast(
 
 
 def extract_chunks_from_ast(
-    tree, code: str, splittable_types: List[str]
+    tree, code_bytes: bytes, splittable_types: Iterable[str]
 ) -> List[Dict[str, Any]]:
     """
     Traverse the AST via a tree-sitter cursor and extract chunks for splittable nodes.
     """
     chunks: List[Dict[str, Any]] = []
-    code_bytes = code.encode("utf-8")
-    splittable = set(splittable_types)
+    splittable = frozenset(splittable_types)  # no copy if already a frozenset
     cursor = tree.walk()
 
-    def visit():
-        while True:
-            node = cursor.node()
-            if node.kind() in splittable:
-                br = node.byte_range()
+    # Iterative pre-order walk: descend to the first child when possible,
+    # otherwise advance to the next sibling, climbing back up as needed.
+    walking = True
+    while walking:
+        node = cursor.node()
+        if node.kind() in splittable:
+            br = node.byte_range()
+            node_bytes = code_bytes[br.start : br.end]
+            # Check for whitespace-only nodes before paying for the decode
+            if node_bytes.strip():
                 sp = node.start_position()
                 ep = node.end_position()
-                node_text = code_bytes[br.start : br.end].decode("utf-8", errors="replace")
-                if node_text.strip():
-                    chunks.append(
-                        {
-                            "content": node_text,
-                            "startLine": sp.row + 1,
-                            "endLine": ep.row + 1,
-                            "startByte": br.start,
-                            "endByte": br.end,
-                        }
-                    )
-            if cursor.goto_first_child():
-                visit()
-                cursor.goto_parent()
-            if not cursor.goto_next_sibling():
+                chunks.append(
+                    {
+                        "content": node_bytes.decode("utf-8", errors="replace"),
+                        "startLine": sp.row + 1,
+                        "endLine": ep.row + 1,
+                        "startByte": br.start,
+                        "endByte": br.end,
+                    }
+                )
+        if cursor.goto_first_child():
+            continue
+        while not cursor.goto_next_sibling():
+            if not cursor.goto_parent():
+                walking = False
                 break
 
-    visit()
-
     # If no meaningful chunks found, create a single chunk with the entire code
     if not chunks:
-        lines = code.split("\n")
         chunks.append(
             {
-                "content": code,
+                "content": code_bytes.decode("utf-8", errors="replace"),
                 "startLine": 1,
-                "endLine": len(lines),
+                "endLine": code_bytes.count(b"\n") + 1,
                 "startByte": 0,
                 "endByte": len(code_bytes),
             }
@@ -228,21 +257,30 @@ def extract_chunks_from_ast(
 
 def refine_large_chunks(
     chunks: List[Dict[str, Any]],
-    original_code: str,
+    original_code: Union[str, bytes],
     chunk_size: int,
     chunk_overlap: int,
 ) -> List[Dict[str, Any]]:
     """
-    Split chunks that exceed the chunk_size limit using character-based chunking.
+    Split chunks that exceed the chunk_size limit using line-based chunking.
+
+    Large chunks are re-split straight from the UTF-8 bytes of ``original_code``
+    (sliced by each chunk's byte range), so no chunk content is re-encoded.
     """
+    if isinstance(original_code, str):
+        original_code = original_code.encode("utf-8")
     refined_chunks = []
 
     for chunk in chunks:
         if len(chunk["content"]) <= chunk_size:
             refined_chunks.append(chunk)
         else:
-            # Chunk is too large, split it using character-based approach
-            sub_chunks = chunk_document(chunk["content"], chunk_size, chunk_overlap)
+            # Chunk is too large, split it using the line-based approach
+            sub_chunks = chunk_document_bytes(
+                original_code[chunk["startByte"] : chunk["endByte"]],
+                chunk_size,
+                chunk_overlap,
+            )
 
             # Adjust line numbers for sub-chunks
             base_start_line = chunk["startLine"]
@@ -262,62 +300,97 @@ def refine_large_chunks(
     return refined_chunks
 
 
+def _plan_chunk_spans(size_lens, byte_lens, chunk_size, chunk_overlap):
+    """Plan line-based chunk boundaries from per-line lengths alone.
+
+    ``size_lens[i]`` is the length of line ``i`` plus its newline in the unit
+    ``chunk_size`` is measured in, and ``byte_lens[i]`` is the same in UTF-8
+    bytes. Working on plain integers keeps string joins and encodes out of the
+    loop; callers materialize chunk content once from the returned spans.
+
+    Returns:
+        A list of ``(start_line_idx, end_line_idx, start_byte, end_byte)``
+        tuples, where line indices are 0-based and the end is exclusive.
+    """
+    # Prefix sums: sizes[k] / offsets[k] are the totals over lines [0, k), so
+    # any window's size is a subtraction rather than a re-sum of its lines
+    sizes = [0, *itertools.accumulate(size_lens)]
+    offsets = sizes if byte_lens is size_lens else [0, *itertools.accumulate(byte_lens)]
+
+    spans = []
+    start = 0  # index of the first line in the current chunk
+    carried = 0  # the overlap carried into a chunk is measured without its last newline
+
+    for i in range(1, len(size_lens)):
+        if sizes[i + 1] - sizes[start] - carried > chunk_size and i > start:
+            spans.append((start, i, offsets[start], offsets[i]))
+
+            num_lines = i - start
+            content_len = sizes[i] - sizes[start] - 1  # joined without a trailing newline
+            if content_len > 0:
+                # Keep at least one new line per chunk so the window always advances
+                overlap_lines = min(int(chunk_overlap / (content_len / num_lines)), num_lines - 1)
+            else:
+                overlap_lines = 0
+
+            start = i - overlap_lines
+            carried = 1 if overlap_lines else 0
+
+    if start < len(size_lens):
+        spans.append((start, len(size_lens), offsets[start], offsets[-1]))
+
+    return spans
+
+
 def chunk_document(document, chunk_size=1000, chunk_overlap=200):
     """Chunks a document using a character-based approach with overlap, tracking byte offsets."""
     lines = document.split("\n")
+    size_lens = [len(line) + 1 for line in lines]  # +1 for newline
+    if document.isascii():
+        byte_lens = size_lens
+    else:
+        byte_lens = [len(line.encode("utf-8")) + 1 for line in lines]
+
     chunks = []
-    current_chunk = []
-    current_size = 0
-    start_line = 1
-    start_byte = 0
-    current_byte = 0
-
-    for i, line in enumerate(lines):
-        line_size = len(line) + 1  # +1 for newline
-
-        if current_size + line_size > chunk_size and current_chunk:
-            chunk_content = "\n".join(current_chunk)
-            end_byte = current_byte
+    for start, end, start_byte, end_byte in _plan_chunk_spans(
+        size_lens, byte_lens, chunk_size, chunk_overlap
+    ):
+        content = "\n".join(lines[start:end])
+        if content.strip():
             chunks.append(
                 {
-                    "content": chunk_content,
-                    "startLine": start_line,
-                    "endLine": start_line + len(current_chunk) - 1,
+                    "content": content,
+                    "startLine": start + 1,
+                    "endLine": end,
                     "startByte": start_byte,
                     "endByte": end_byte,
                 }
             )
+    return chunks
 
-            if chunk_content:
-                overlap_lines = min(
-                    int(chunk_overlap / (len(chunk_content) / len(current_chunk))),
-                    len(current_chunk),
-                )
-            else:
-                overlap_lines = 0
-
-            new_start_line = start_line + len(current_chunk) - overlap_lines
-            # Calculate byte offset for overlap start
-            overlap_content = "\n".join(current_chunk[-overlap_lines:])
-            start_byte = end_byte - len(overlap_content.encode("utf-8"))
-            current_chunk = current_chunk[-overlap_lines:]
-            current_size = len("\n".join(current_chunk))
-            start_line = new_start_line
 
-        current_chunk.append(line)
-        current_size += line_size
-        current_byte += line_size
+def chunk_document_bytes(code_bytes: bytes, chunk_size=1000, chunk_overlap=200):
+    """Byte-native variant of chunk_document for UTF-8 encoded documents.
 
-    if current_chunk:
-        chunk_content = "\n".join(current_chunk)
-        chunks.append(
-            {
-                "content": chunk_content,
-                "startLine": start_line,
-                "endLine": start_line + len(current_chunk) - 1,
-                "startByte": start_byte,
-                "endByte": current_byte,
-            }
-        )
+    Splits on ``b"\\n"`` and tracks byte offsets directly, so offsets are exact
+    without re-encoding any chunk. Sizes are measured in bytes.
+    """
+    lines = code_bytes.split(b"\n")
+    line_lens = [len(line) + 1 for line in lines]  # +1 for newline
 
-    return [chunk for chunk in chunks if chunk["content"].strip()]
+    chunks = []
+    for start, end, start_byte, end_byte in _plan_chunk_spans(
+        line_lens, line_lens, chunk_size, chunk_overlap
+    ):
+        content = b"\n".join(lines[start:end]).decode("utf-8", errors="replace")
+        if content.strip():
+            chunks.append(
+                {
+                    "content": content,
+                    "startLine": start + 1,
+                    "endLine": end,
+                    "startByte": start_byte,
+                    "endByte": end_byte,
+                }
+            )
+    return chunks
@@ -2,11 +2,39 @@
 This module provides functionality for generating embeddings using a pre-trained model.
 """
 
+import contextlib
+import hashlib
+import os
+import sqlite3
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process file locks
+    fcntl = None
+
+import faiss
 import numpy as np
 from llama_cpp import Llama
 
 # Global variables for lazy-loaded models
 _model = None
+_model_lock = threading.Lock()
+# llama.cpp contexts aren't thread-safe; search and indexing threads take
+# turns running inference
+_inference_lock = threading.Lock()
+# Whether the loaded model returns token-level (2D) embeddings; probed once on load
+_token_level_embeddings = None
+
+MODEL_REPO = "jinaai/jina-code-embeddings-1.5b-GGUF"
+MODEL_FILENAME = "jina-code-embeddings-1.5b-Q8_0.gguf"
+# Identifies the model in embedding cache keys; changing the model invalidates the cache
+MODEL_ID = "jina-code-embeddings-1.5b-Q8_0"
+
+# Context and batch sizes the model is loaded with; batched embedding requests
+# are packed so that their combined token count stays within these limits.
+N_CTX = 32768
+N_BATCH = 32768
 
 # Instruction prefixes for Jina code embeddings model
 INSTRUCTION_CONFIG = {
@@ -35,19 +63,68 @@ INSTRUCTION_CONFIG = {
 
 def get_model():
     """Lazy-load the Llama model only when needed."""
-    global _model
-    if _model is None:
-        _model = Llama.from_pretrained(
-            "jinaai/jina-code-embeddings-1.5b-GGUF",
-            filename="jina-code-embeddings-1.5b-Q8_0.gguf",
-            embedding=True,
-            n_gpu_layers=-1,
-            n_ctx=32768,
-            n_batch=32768,
-        )
+    global _model, _token_level_embeddings
+    if _model is not None:
+        return _model
+    # Loading takes seconds; callers racing a warm-up wait for it instead of
+    # loading a second copy
+    with _model_lock:
+        if _model is None:
+            model = Llama.from_pretrained(
+                MODEL_REPO,
+                filename=MODEL_FILENAME,
+                embedding=True,
+                n_gpu_layers=-1,
+                n_ctx=N_CTX,
+                n_batch=N_BATCH,
+            )
+            # The output layout is fixed per model, so probe it once instead of
+            # checking the shape of every embedding
+            _token_level_embeddings = _is_token_level(
+                model.create_embedding("test")["data"][0]["embedding"]
+            )
+            _model = model
     return _model
 
 
+def warm_up_model() -> threading.Thread:
+    """Start loading the model in a background thread.
+
+    Lets model initialization overlap other work, such as cloning and
+    chunking a repository. A load error is left for the next
+    :func:`get_model` call to raise.
+    """
+
+    def load():
+        try:
+            get_model()
+        except Exception:
+            pass
+
+    thread = threading.Thread(target=load, name="model-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def _is_token_level(embedding) -> bool:
+    """Whether a raw llama.cpp embedding holds one vector per token."""
+    return len(embedding) > 0 and not np.isscalar(embedding[0])
+
+
+def _stack_embeddings(data) -> np.ndarray:
+    """Convert a ``create_embedding`` response into an ``(n, d)`` float32 matrix.
+
+    The model uses embeddings-last format - if we got token-level embeddings,
+    we take each text's last token embedding. Only that row is converted.
+    """
+    token_level = _token_level_embeddings
+    if token_level is None:
+        token_level = _is_token_level(data[0]["embedding"])
+    if token_level:
+        return np.array([item["embedding"][-1] for item in data], dtype=np.float32)
+    return np.array([item["embedding"] for item in data], dtype=np.float32)
+
+
 def get_embedding(text):
     """Generate a single-vector embedding using jina-code-embeddings-1.5b.
 
@@ -56,24 +133,294 @@ def get_embedding(text):
     model = get_model()
 
     # Get the embedding - llama.cpp returns token-level embeddings
-    embedding = model.create_embedding(text)["data"][0]["embedding"]
-    embedding = np.array(embedding, dtype=np.float32)
+    with _inference_lock:
+        data = model.create_embedding(text)["data"]
+    embeddings = _stack_embeddings(data)
+
+    # Normalize in place; zero vectors are left as-is
+    faiss.normalize_L2(embeddings)
 
-    # If we got multiple token embeddings, take the last one (embeddings-last format)
-    if embedding.ndim == 2:
-        embedding = embedding[-1]
+    return embeddings[0]
 
-    # Normalize the embedding
-    norm = np.linalg.norm(embedding)
-    if norm > 0:
-        embedding = embedding / norm
 
-    return embedding
+def _pack_batches(model, texts, max_tokens=min(N_CTX, N_BATCH)):
+    """Greedily pack texts into batches whose summed token count fits in ``max_tokens``.
 
-def get_embeddings(texts, progress_callback=None):
-    embeddings = []
+    Yields lists of indices into ``texts``. A single text that exceeds the
+    limit on its own is still emitted as a one-element batch.
+    """
+    batch = []
+    batch_tokens = 0
     for i, text in enumerate(texts):
-        embeddings.append(get_embedding(text))
+        n_tokens = len(model.tokenize(text.encode("utf-8")))
+        if batch and batch_tokens + n_tokens > max_tokens:
+            yield batch
+            batch = []
+            batch_tokens = 0
+        batch.append(i)
+        batch_tokens += n_tokens
+    if batch:
+        yield batch
+
+
+def _embed_into(texts, rows, allocate, progress_callback=None, batch_callback=None):
+    """Embed texts in token-bounded batches, writing each batch straight into the output.
+
+    ``texts[i]`` is written to row ``rows[i]`` of the matrix returned by
+    ``allocate(dim)``, which is called once the embedding dimension is known.
+    Each batch is normalized in place before it is written, then passed to
+    ``batch_callback(indices, vectors)`` with its indices into ``texts``.
+    """
+    model = get_model()
+    out = None
+    done = 0
+
+    for batch in _pack_batches(model, texts):
+        with _inference_lock:
+            data = model.create_embedding([texts[i] for i in batch])["data"]
+        vectors = _stack_embeddings(data)
+        if out is None:
+            out = allocate(vectors.shape[1])
+        # Normalize the batch in place; zero vectors are left as-is
+        faiss.normalize_L2(vectors)
+        out[[rows[i] for i in batch]] = vectors
+        if batch_callback:
+            batch_callback(batch, vectors)
+        done += len(batch)
         if progress_callback:
-            progress_callback(i + 1, len(texts))
-    return embeddings
+            progress_callback(done, len(texts))
+
+
+def _allocate_output(shape, out_path=None):
+    """Allocate the embedding matrix in memory, or as a file-backed memmap at ``out_path``."""
+    if out_path is None:
+        return np.empty(shape, dtype=np.float32)
+    return np.memmap(out_path, dtype=np.float32, mode="w+", shape=shape)
+
+
+# One lock per cache directory, shared by every EmbeddingCache opened on it in
+# this process; fcntl.flock on the directory's lock file covers other processes
+_cache_dir_locks: dict = {}
+_cache_dir_locks_guard = threading.Lock()
+
+
+def _cache_dir_lock(cache_dir: str) -> threading.Lock:
+    key = os.path.realpath(cache_dir)
+    with _cache_dir_locks_guard:
+        return _cache_dir_locks.setdefault(key, threading.Lock())
+
+
+class EmbeddingCache:
+    """Content-addressed on-disk store of normalized embeddings.
+
+    Vectors are appended to a flat float32 file that is memory-mapped for
+    reads; a sqlite table maps each content hash to its row in that file.
+    Lookups and stores hold the cache directory's lock, so concurrent
+    indexing jobs sharing a directory never record rows at the wrong offset.
+    """
+
+    _LOOKUP_CHUNK = 500  # stay well below sqlite's bound-parameter limit
+
+    def __init__(self, cache_dir: str):
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = _cache_dir_lock(cache_dir)
+        self._lock_file = open(os.path.join(cache_dir, "lock"), "ab")
+        self._vectors_path = os.path.join(cache_dir, "vectors.f32")
+        self._db = sqlite3.connect(os.path.join(cache_dir, "index.sqlite"))
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (hash BLOB PRIMARY KEY, row INTEGER NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self._load_dim()
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Hold the cache directory exclusively, across threads and processes."""
+        with self._lock:
+            if fcntl is not None:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _load_dim(self) -> None:
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        self.dim = int(row[0]) if row else None
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        """Cache key for a text, which already carries its instruction prefix.
+
+        A 128-bit BLAKE2b digest: faster than SHA-256 on hosts without SHA
+        extensions, and ample for a content-addressed cache.
+        """
+        return hashlib.blake2b(
+            f"{MODEL_ID}\0{text}".encode("utf-8"), digest_size=16
+        ).digest()
+
+    def lookup(self, keys) -> dict:
+        """Return a mapping of cached key -> embedding for the keys present in the cache."""
+        with self._locked():
+            return self._lookup(keys)
+
+    def _lookup(self, keys) -> dict:
+        if self.dim is None:
+            self._load_dim()  # another job may have stored the first vectors since
+        if self.dim is None or not os.path.exists(self._vectors_path):
+            return {}
+
+        unique_keys = list(dict.fromkeys(keys))
+        rows = {}
+        for start in range(0, len(unique_keys), self._LOOKUP_CHUNK):
+            chunk = unique_keys[start : start + self._LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows.update(
+                self._db.execute(
+                    f"SELECT hash, row FROM embeddings WHERE hash IN ({placeholders})",
+                    chunk,
+                )
+            )
+        if not rows:
+            return {}
+
+        vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r").reshape(-1, self.dim)
+        return {key: np.array(vectors[row]) for key, row in rows.items() if row < len(vectors)}
+
+    def store(self, keys, vectors) -> None:
+        """Append embeddings for keys that are not yet cached."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self._locked():
+            self._store(keys, vectors)
+
+    def _store(self, keys, vectors) -> None:
+        if self.dim is None:
+            self._load_dim()
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('dim', ?)", (str(self.dim),))
+        elif vectors.shape[1] != self.dim:
+            return
+
+        row_bytes = self.dim * vectors.itemsize
+        with open(self._vectors_path, "ab") as f:
+            # The directory lock is held, so the file's current size is where
+            # this batch lands
+            size = os.fstat(f.fileno()).st_size
+            if size % row_bytes:
+                # Drop a partially written trailing row from an interrupted run
+                size -= size % row_bytes
+                f.truncate(size)
+            f.write(vectors.tobytes())
+
+        start_row = size // row_bytes
+        self._db.executemany(
+            "INSERT OR IGNORE INTO embeddings VALUES (?, ?)",
+            zip(keys, range(start_row, start_row + len(vectors))),
+        )
+        self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+        self._lock_file.close()
+
+
+def get_embeddings(texts, progress_callback=None, cache_dir=None, out_path=None, buffer=None):
+    """Generate normalized embeddings for many texts using batched model calls.
+
+    Texts are packed into token-bounded batches and each batch is embedded with
+    a single ``create_embedding`` call. ``progress_callback(done, total)`` is
+    invoked after every batch. Identical texts are only embedded once.
+
+    If ``cache_dir`` is given, embeddings are looked up in (and written back
+    to) an :class:`EmbeddingCache` there, so only uncached texts reach the model.
+
+    If ``out_path`` is given, the result is a ``np.memmap`` backed by that file
+    and batches are written into it as they are produced, so the full matrix
+    never has to be held in memory.
+
+    If ``buffer`` is given and is a float32 matrix with enough rows of the
+    right width, the result is written into its leading rows and returned as
+    a view, so callers embedding repeatedly can skip the allocation.
+
+    Returns:
+        A ``(len(texts), d)`` float32 matrix of L2-normalized embeddings.
+    """
+    texts = list(texts)
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+
+    out = None
+
+    def allocate(dim):
+        nonlocal out
+        if out is None:
+            if (
+                buffer is not None
+                and out_path is None
+                and buffer.dtype == np.float32
+                and buffer.shape[0] >= len(texts)
+                and buffer.shape[1] == dim
+            ):
+                out = buffer[: len(texts)]
+            else:
+                out = _allocate_output((len(texts), dim), out_path)
+        return out
+
+    cache = EmbeddingCache(cache_dir) if cache_dir is not None else None
+    try:
+        hits = {}
+        if cache is not None:
+            keys = [cache.key(text) for text in texts]
+            hits = cache.lookup(keys)
+            misses = [i for i, key in enumerate(keys) if key not in hits]
+        else:
+            misses = list(range(len(texts)))
+        if hits:
+            allocate(cache.dim)
+            for i, key in enumerate(keys):
+                if key in hits:
+                    out[i] = hits[key]
+
+        # Repeated texts (license headers, generated code) are embedded once;
+        # later occurrences are copied from the first after embedding
+        first_row = {}
+        unique_misses = []
+        duplicates = []
+        for i in misses:
+            j = first_row.setdefault(texts[i], i)
+            if j == i:
+                unique_misses.append(i)
+            else:
+                duplicates.append((i, j))
+
+        num_skipped = len(texts) - len(unique_misses)
+        if progress_callback and num_skipped:
+            progress_callback(num_skipped, len(texts))
+
+        if unique_misses:
+            report = None
+            if progress_callback:
+                def report(done, _total):
+                    progress_callback(num_skipped + done, len(texts))
+
+            store = None
+            if cache is not None:
+                # Cached batch by batch as produced, so writing back never
+                # gathers more than one batch of rows in memory
+                def store(batch, vectors):
+                    cache.store([keys[unique_misses[i]] for i in batch], vectors)
+
+            _embed_into([texts[i] for i in unique_misses], unique_misses, allocate, report, store)
+
+        if duplicates:
+            dup_rows, src_rows = (list(rows) for rows in zip(*duplicates))
+            out[dup_rows] = out[src_rows]
+
+        return out
+    finally:
+        if cache is not None:
+            cache.close()
@@ -5,19 +5,198 @@ This module provides the core indexing functionality for the code-context librar
 import faiss
 import git
 import hashlib
+import io
+import itertools
 import json
+import multiprocessing
 import numpy as np
 import os
 import shutil
 import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from .chunking import chunk_document_ast
-from .embedding import get_embeddings, INSTRUCTION_CONFIG
-from .utils import walk_repo, _load_gitignore_patterns
+from .embedding import get_embeddings, warm_up_model, INSTRUCTION_CONFIG
+from .utils import walk_repo
 
 INDEXES_DIR = "indexes"
 CLONES_DIR = "clones"
+# Persistent embedding cache shared by all indexes; skipped by list_indexes
+EMBEDDING_CACHE_DIR = os.path.join(INDEXES_DIR, "_emb_cache")
+
+# HNSW graph parameters: neighbours per node and build/search beam widths
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+INDEX_TYPE_HNSW_SQ = "hnsw_sq"
+INDEX_TYPE_CAGRA = "cagra"
+
+# Graph builder: "hnsw" (CPU) or "cagra", which builds the graph on the GPU with
+# cuVS CAGRA and needs a faiss build with cuVS support
+INDEX_BACKEND = os.getenv("CODE_CONTEXT_INDEX_BACKEND", "hnsw").lower()
+
+# Precision of the vectors stored in the index: "int8" (default) or "fp16".
+# Search scans the stored vectors, so it is bound by memory bandwidth; int8
+# quarters the bytes per vector relative to fp32 with negligible recall loss
+# on normalized embeddings. Queries stay float32 and are compared against the
+# quantized vectors by faiss.
+INDEX_PRECISION = os.getenv("CODE_CONTEXT_INDEX_PRECISION", "int8").lower()
+_SCALAR_QUANTIZER_TYPES = {
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+    "int8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+
+def build_faiss_index(embeddings_matrix: np.ndarray, precision: str = INDEX_PRECISION):
+    """Build an inner-product HNSW index over normalized embeddings.
+
+    Inner product on normalized vectors is cosine similarity. HNSW gives
+    logarithmic query time instead of the flat index's linear scan, and the
+    vectors are stored scalar-quantized at ``precision``. With
+    ``INDEX_BACKEND == "cagra"`` the graph is built by CAGRA instead.
+
+    Returns:
+        A ``(index, index_type)`` tuple; ``index_type`` is recorded in
+        ``index_config.json`` alongside the precision.
+    """
+    if INDEX_BACKEND == "cagra":
+        return _build_cagra_index(embeddings_matrix), INDEX_TYPE_CAGRA
+
+    if precision not in _SCALAR_QUANTIZER_TYPES:
+        raise ValueError(
+            f"Unsupported index precision {precision!r}; "
+            f"expected one of {sorted(_SCALAR_QUANTIZER_TYPES)}"
+        )
+    dimension = embeddings_matrix.shape[1]
+    index = faiss.IndexHNSWSQ(
+        dimension,
+        _SCALAR_QUANTIZER_TYPES[precision],
+        HNSW_M,
+        faiss.METRIC_INNER_PRODUCT,
+    )
+    index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    index.hnsw.efSearch = HNSW_EF_SEARCH
+    index.train(embeddings_matrix)
+    index.add(embeddings_matrix)
+    return index, INDEX_TYPE_HNSW_SQ
+
+
+def _build_cagra_index(embeddings_matrix: np.ndarray):
+    """Build the search graph on the GPU with cuVS CAGRA.
+
+    The result is converted to its CPU form (an HNSW index over full-precision
+    vectors) for saving; search can still run it on CPU, or move it back to
+    the GPU as a CAGRA index when one is available.
+    """
+    if not hasattr(faiss, "GpuIndexCagra"):
+        raise RuntimeError(
+            "CODE_CONTEXT_INDEX_BACKEND=cagra requires a faiss build with cuVS support"
+        )
+    resources = faiss.StandardGpuResources()
+    index = faiss.GpuIndexCagra(
+        resources, embeddings_matrix.shape[1], faiss.METRIC_INNER_PRODUCT
+    )
+    index.train(embeddings_matrix)
+    cpu_index = faiss.index_gpu_to_cpu(index)
+    cpu_index.hnsw.efSearch = HNSW_EF_SEARCH
+    return cpu_index
+
+
+def _dumps(obj) -> bytes:
+    """Serialize ``obj`` as compact JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def _write_bytes(path: str, data: bytes) -> None:
+    """Durably replace ``path`` with ``data``; files are renamed into place
+    because search keeps them memory-mapped."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _write_json(path: str, obj) -> None:
+    """Write ``obj`` as compact JSON and fsync it."""
+    _write_bytes(path, _dumps(obj))
+
+
+def _write_chunk_columns(index_path: str, metadata: list) -> None:
+    """Write chunk metadata column-wise to ``chunks_metadata.npz`` for fast lookups.
+
+    File paths are interned: ``filepaths`` lists each distinct path once and
+    ``filepath_ids`` indexes into it. The other columns mirror the JSON fields.
+    """
+    path_ids = {}
+    columns = {
+        "filepath_ids": np.fromiter(
+            (path_ids.setdefault(m["filepath"], len(path_ids)) for m in metadata),
+            dtype=np.int32,
+            count=len(metadata),
+        ),
+        "start_line": np.fromiter((m["startLine"] for m in metadata), dtype=np.int32, count=len(metadata)),
+        "end_line": np.fromiter((m["endLine"] for m in metadata), dtype=np.int32, count=len(metadata)),
+        "start_byte": np.fromiter((m["startByte"] for m in metadata), dtype=np.int64, count=len(metadata)),
+        "end_byte": np.fromiter((m["endByte"] for m in metadata), dtype=np.int64, count=len(metadata)),
+    }
+    buffer = io.BytesIO()
+    np.savez(buffer, filepaths=np.array(list(path_ids), dtype=str), **columns)
+    _write_bytes(os.path.join(index_path, "chunks_metadata.npz"), buffer.getvalue())
+
+
+def _fsync_path(path: str) -> None:
+    """Flush a file written by another library (e.g. FAISS) to disk."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _chunk_file(item):
+    """Chunk a single ``(filepath, content)`` pair; runs in a chunking worker process."""
+    filepath, content = item
+    return filepath, chunk_document_ast(content, filepath)
+
+
+# Files handed to a chunking worker per task, amortizing inter-process overhead
+CHUNK_BATCH = 8
+
+
+def _chunk_files(batch):
+    """Chunk a batch of ``(filepath, content)`` pairs; runs in a chunking worker process."""
+    return [_chunk_file(item) for item in batch]
+
+
+def _chunk_in_order(executor, files, max_pending):
+    """Yield ``(filepath, chunks)`` for ``files`` in order, chunked on ``executor``.
+
+    Unlike ``Executor.map``, which submits every item up front, at most
+    ``max_pending`` batches are in flight; more files are taken from
+    ``files`` only as results are consumed, so a streaming walk stays
+    streaming.
+    """
+    files = iter(files)
+    pending = deque()
+    while True:
+        batch = list(itertools.islice(files, CHUNK_BATCH))
+        if batch:
+            pending.append(executor.submit(_chunk_files, batch))
+        if not pending:
+            return
+        if not batch or len(pending) >= max_pending:
+            yield from pending.popleft().result()
 
 
 def _do_index(job_id: str, repo_url: str, force: bool, is_local: bool = False, _indexing_jobs: dict = None, _indexing_lock=None):
@@ -74,8 +253,6 @@ def index_repository_direct(repo_url: str, force: bool = False, is_local: bool =
                 _indexing_jobs[job_id]["revision"] = revision
         else:
             print(f"Processing local directory: {abs_path}")
-
-        ignore_spec = _load_gitignore_patterns(clone_path)
     else:
         if _indexing_lock and _indexing_jobs and job_id:
             with _indexing_lock:
@@ -141,6 +318,9 @@ def index_repository_direct(repo_url: str, force: bool = False, is_local: bool =
             print(f"Repository {repo_url} at revision {revision} is already cloned and likely indexed.")
         return index_name
 
+    # Load the embedding model while the repository is cloned and chunked
+    warm_up_model()
+
     # Clone the repository (only if it's a remote git repo)
     if not is_local:
         if _indexing_lock and _indexing_jobs and job_id:
@@ -152,7 +332,6 @@ def index_repository_direct(repo_url: str, force: bool = False, is_local: bool =
             print(f"Cloning repository from {repo_url}...")
 
         git.Repo.clone_from(repo_url, clone_path)
-        ignore_spec = _load_gitignore_patterns(clone_path)
 
     if _indexing_lock and _indexing_jobs and job_id:
         with _indexing_lock:
@@ -166,23 +345,28 @@ def index_repository_direct(repo_url: str, force: bool = False, is_local: bool =
     documents = []
     metadata = []
 
-    for filepath, content in walk_repo(clone_path, ignore_spec):
-        chunks = chunk_document_ast(content, filepath)
-        for chunk in chunks:
-            # Use nl2code passage prefix for code chunks
-            prefixed_content = (
-                INSTRUCTION_CONFIG["nl2code"]["passage"] + chunk["content"]
-            )
-            documents.append(prefixed_content)
-            metadata.append(
-                {
-                    "filepath": filepath,
-                    "startLine": chunk["startLine"],
-                    "endLine": chunk["endLine"],
-                    "startByte": chunk["startByte"],
-                    "endByte": chunk["endByte"],
-                }
-            )
+    # Chunking is CPU-bound and independent per file, so fan it out across
+    # processes. Workers are spawned rather than forked so they never inherit
+    # the loaded embedding model or the server's threads; each keeps its own
+    # parser cache.
+    with ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn")) as executor:
+        max_pending = (os.cpu_count() or 1) * 4
+        for filepath, chunks in _chunk_in_order(executor, walk_repo(clone_path), max_pending):
+            for chunk in chunks:
+                # Use nl2code passage prefix for code chunks
+                prefixed_content = (
+                    INSTRUCTION_CONFIG["nl2code"]["passage"] + chunk["content"]
+                )
+                documents.append(prefixed_content)
+                metadata.append(
+                    {
+                        "filepath": filepath,
+                        "startLine": chunk["startLine"],
+                        "endLine": chunk["endLine"],
+                        "startByte": chunk["startByte"],
+                        "endByte": chunk["endByte"],
+                    }
+                )
 
     if _indexing_lock and _indexing_jobs and job_id:
         with _indexing_lock:
@@ -205,8 +389,13 @@ def index_repository_direct(repo_url: str, force: bool = False, is_local: bool =
         else:
             print(f"Generating embeddings: {current}/{total} chunks...")
 
-    document_embeddings = get_embeddings(
-        documents, progress_callback=update_progress
+    # Embeddings stream into a file-backed matrix instead of accumulating in memory
+    embeddings_path = os.path.join(index_path, "embeddings.f32")
+    embeddings_matrix = get_embeddings(
+        documents,
+        progress_callback=update_progress,
+        cache_dir=EMBEDDING_CACHE_DIR,
+        out_path=embeddings_path,
     )
 
     if _indexing_lock and _indexing_jobs and job_id:
@@ -216,29 +405,34 @@ def index_repository_direct(repo_url: str, force: bool = False, is_local: bool =
     else:
         print("Creating FAISS index...")
 
-    # Stack embeddings into a matrix for FAISS
-    embeddings_matrix = np.stack(document_embeddings).astype("float32")
-
-    # Create FAISS flat index with inner product (for normalized vectors, this is cosine similarity)
-    dimension = embeddings_matrix.shape[1]
-    index = faiss.IndexFlatIP(dimension)
-
-    # Add vectors to the index
-    index.add(embeddings_matrix)
-
-    # Save FAISS index
+    # Create the FAISS index (inner product on normalized vectors = cosine similarity)
+    index, index_type = build_faiss_index(embeddings_matrix)
 
+    # Save FAISS index via a temporary file renamed into place: search keeps
+    # the index memory-mapped, so the live file must never be truncated
     faiss_index_path = os.path.join(index_path, "faiss.index")
-    faiss.write_index(index, faiss_index_path)
-
-    # Save chunk mapping file
-    metadata_path = os.path.join(index_path, "chunks_metadata.json")
-    with open(metadata_path, "w", encoding="utf-8") as f:
-        json.dump(metadata, f, indent=2)
-
-    index_config_path = os.path.join(index_path, "index_config.json")
-    with open(index_config_path, "w", encoding="utf-8") as f:
-        json.dump(
-            {"original_repo_path": clone_path, "is_local": is_local}, f, indent=2
-        )
+    tmp_index_path = faiss_index_path + ".tmp"
+    faiss.write_index(index, tmp_index_path)
+    _fsync_path(tmp_index_path)
+    os.replace(tmp_index_path, faiss_index_path)
+
+    # The index holds its own copy of the vectors; drop the float32 staging file
+    del embeddings_matrix
+    if os.path.exists(embeddings_path):
+        os.remove(embeddings_path)
+
+    # Save chunk mapping file, plus the columnar copy get_chunk reads
+    _write_json(os.path.join(index_path, "chunks_metadata.json"), metadata)
+    _write_chunk_columns(index_path, metadata)
+
+    _write_json(
+        os.path.join(index_path, "index_config.json"),
+        {
+            "original_repo_path": clone_path,
+            "is_local": is_local,
+            "index_type": index_type,
+            # CAGRA graphs keep full-precision vectors
+            "precision": "fp32" if index_type == INDEX_TYPE_CAGRA else INDEX_PRECISION,
+        },
+    )
     return index_name
@@ -4,38 +4,96 @@ This module provides a web service for code context, including indexing and sear
 
 import faiss
 from fastmcp import FastMCP
+import json
+import numpy as np
 import os
 import queue
 import threading
+import time
 import traceback
+from collections import OrderedDict
+from concurrent.futures import Future
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Optional, Tuple
 
-from .embedding import INSTRUCTION_CONFIG, get_embedding
-from .indexing import _do_index, CLONES_DIR, INDEXES_DIR
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .chunking import convert_ipynb_to_python
+from .embedding import INSTRUCTION_CONFIG, get_embeddings
+from .indexing import _do_index, CLONES_DIR, HNSW_EF_SEARCH, INDEXES_DIR
+
+# orjson decodes metadata several times faster when it is installed
+_json_loads = orjson.loads if orjson is not None else json.loads
 
 mcp = FastMCP(name="code-context: Context Server for Arbitrary Code")
 
-# Global variables for async indexing status
+# Global variables for async indexing status. _indexing_lock guards the
+# registry (adding jobs); each job's status dict is guarded by its own lock
+# in _job_locks, so workers updating one job never block polls of another.
 _indexing_jobs: Dict[str, Dict[str, Any]] = {}
 _indexing_lock = threading.Lock()
+_job_locks: Dict[str, threading.Lock] = {}
 
-# Queue for sequential processing of indexing jobs
+# Queue of indexing jobs shared by a small pool of worker threads. Different
+# repositories are indexed concurrently (model inference is still serialized);
+# set CODE_CONTEXT_INDEXING_WORKERS=1 to process jobs strictly in order.
+INDEXING_WORKERS = max(1, int(os.getenv("CODE_CONTEXT_INDEXING_WORKERS", "2")))
 _indexing_queue = queue.Queue()
-_indexing_worker_thread = None
+_indexing_worker_threads: list = []
 _indexing_worker_lock = threading.Lock()
 
+# Per-repository locks so two jobs never index the same repository at once
+_repo_locks: Dict[str, threading.Lock] = {}
+
+# Indexes are memory-mapped read-only so their vector codes are paged in on
+# demand and shared through the page cache instead of copied onto the heap.
+# IO_FLAG_MMAP_IFC maps the codes of flat and HNSW storage; older faiss
+# builds only have IO_FLAG_MMAP, which maps IVF inverted lists.
+INDEX_IO_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+# With a GPU build of faiss, indexes at least this large are searched on the
+# GPU(s); below it, transfer and launch overhead outweighs the speedup.
+GPU_MIN_VECTORS = 100_000
+
+# Loaded FAISS indexes and chunk metadata, keyed by path, least recently used
+# first. Entries are invalidated when the file's mtime changes (e.g. after a
+# forced re-index).
+MAX_CACHED_INDEXES = 8
+_index_cache: "OrderedDict[str, Tuple[int, Any]]" = OrderedDict()
+_metadata_cache: "OrderedDict[str, Tuple[int, Any]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _repo_lock(repo_key: str) -> threading.Lock:
+    """Returns the lock serializing jobs for one repository."""
+    with _indexing_worker_lock:
+        return _repo_locks.setdefault(repo_key, threading.Lock())
+
+
+def _job_lock(job_id: str) -> threading.Lock:
+    """Returns the lock guarding one job's status dict."""
+    job_lock = _job_locks.get(job_id)
+    if job_lock is None:
+        with _indexing_lock:
+            job_lock = _job_locks.setdefault(job_id, threading.Lock())
+    return job_lock
+
 
 def _indexing_worker():
-    """Worker thread that processes indexing jobs sequentially from the queue."""
+    """Worker thread that processes indexing jobs from the shared queue."""
     while True:
         job = _indexing_queue.get()
         if job is None:  # Sentinel value to stop the worker
             break
 
         job_id, repo_url, force, is_local = job
+        repo_key = os.path.abspath(repo_url) if is_local else repo_url
         try:
-            _do_index(job_id, repo_url, force, is_local, _indexing_jobs, _indexing_lock)
+            with _repo_lock(repo_key):
+                _do_index(job_id, repo_url, force, is_local, _indexing_jobs, _job_lock(job_id))
         except Exception:
             # Errors are already handled in _do_index
             pass
@@ -44,14 +102,13 @@ def _indexing_worker():
 
 
 def _ensure_indexing_worker():
-    """Ensures the indexing worker thread is running."""
-    global _indexing_worker_thread
+    """Ensures the pool of indexing worker threads is running."""
     with _indexing_worker_lock:
-        if _indexing_worker_thread is None or not _indexing_worker_thread.is_alive():
-            _indexing_worker_thread = threading.Thread(
-                target=_indexing_worker, daemon=True
-            )
-            _indexing_worker_thread.start()
+        _indexing_worker_threads[:] = [t for t in _indexing_worker_threads if t.is_alive()]
+        while len(_indexing_worker_threads) < INDEXING_WORKERS:
+            thread = threading.Thread(target=_indexing_worker, daemon=True)
+            thread.start()
+            _indexing_worker_threads.append(thread)
 
 
 @mcp.tool()
@@ -71,11 +128,12 @@ def index(repo_url: str, force: bool = False) -> str:
     is_local = os.path.isabs(repo_url) or repo_url.startswith("/")
 
     if is_local:
-        base_name = os.path.basename(repo_url.rstrip("/"))
+        base_name = repo_url.rstrip("/").rpartition("/")[2]
     else:
-        base_name = os.path.basename(repo_url).replace(".git", "")
+        base_name = repo_url.rpartition("/")[2].removesuffix(".git")
 
-    job_id = f"{base_name}-{datetime.now().timestamp()}"
+    started_at_ns = time.time_ns()
+    job_id = f"{base_name}-{started_at_ns}"
 
     with _indexing_lock:
         _indexing_jobs[job_id] = {
@@ -83,28 +141,40 @@ def index(repo_url: str, force: bool = False) -> str:
             "repo_url": repo_url,
             "status": "queued",
             "message": "Indexing job queued, waiting for worker",
-            "started_at": datetime.now().isoformat(),
+            "started_at_ns": started_at_ns,
             "force": force,
         }
+        _job_locks[job_id] = threading.Lock()
 
-    # Add job to the queue for sequential processing
+    # Add job to the queue for the worker pool
     _indexing_queue.put((job_id, repo_url, force, is_local))
 
     source_type = "local directory" if is_local else "repository"
-    return f"Indexing job queued for {source_type} with ID: {job_id}. Jobs are processed sequentially. Use get_index_status('{job_id}') to check progress."
+    return f"Indexing job queued for {source_type} with ID: {job_id}. Up to {INDEXING_WORKERS} jobs run at once. Use get_index_status('{job_id}') to check progress."
+
+
+def _job_status(job_info: Dict[str, Any]) -> Dict[str, Any]:
+    """Copies a job's status dict for a response, formatting its start time."""
+    status = job_info.copy()
+    started_at_ns = status.pop("started_at_ns", None)
+    if started_at_ns is not None:
+        status["started_at"] = datetime.fromtimestamp(started_at_ns / 1e9).isoformat()
+    return status
 
 
 @mcp.tool()
 def get_index_status(job_id: str) -> Dict[str, Any]:
     """Gets the status of an indexing job by its job ID."""
     try:
-        with _indexing_lock:
-            if job_id not in _indexing_jobs:
+        job_lock = _job_locks.get(job_id)
+        if job_lock is None or job_id not in _indexing_jobs:
+            with _indexing_lock:
                 return {
                     "error": f"Job ID '{job_id}' not found",
                     "available_jobs": list(_indexing_jobs.keys()),
                 }
-            return _indexing_jobs[job_id].copy()
+        with job_lock:
+            return _job_status(_indexing_jobs[job_id])
     except Exception as e:
         return {
             "error": f"Error getting index status: {str(e)}",
@@ -116,10 +186,14 @@ def get_index_status(job_id: str) -> Dict[str, Any]:
 def list_indexing_jobs() -> Dict[str, Dict[str, Any]]:
     """Lists all indexing jobs and their current status."""
     try:
+        # Snapshot the registry, then copy each job under its own lock
         with _indexing_lock:
-            return {
-                job_id: job_info.copy() for job_id, job_info in _indexing_jobs.items()
-            }
+            jobs = list(_indexing_jobs.items())
+        snapshot = {}
+        for job_id, job_info in jobs:
+            with _job_lock(job_id):
+                snapshot[job_id] = _job_status(job_info)
+        return snapshot
     except Exception as e:
         return {
             "error": f"Error listing indexing jobs: {str(e)}",
@@ -132,7 +206,219 @@ def list_indexes() -> list[str]:
     """Lists available indexes."""
     if not os.path.exists(INDEXES_DIR):
         return []
-    return os.listdir(INDEXES_DIR)
+    # Underscore-prefixed entries (e.g. the embedding cache) are not indexes
+    return [name for name in os.listdir(INDEXES_DIR) if not name.startswith("_")]
+
+
+def _cached_load(cache: OrderedDict, path: str, load: Callable[[], Any]) -> Any:
+    """Return ``load()`` for a file, reusing the cached value while its mtime is unchanged."""
+    mtime = os.stat(path).st_mtime_ns
+    with _cache_lock:
+        cached = cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            cache.move_to_end(path)
+            return cached[1]
+
+    # Load outside the lock so a cold read doesn't stall requests for other indexes
+    value = load()
+
+    with _cache_lock:
+        cache[path] = (mtime, value)
+        cache.move_to_end(path)
+        while len(cache) > MAX_CACHED_INDEXES:
+            cache.popitem(last=False)
+    return value
+
+
+def _read_index(faiss_index_path: str) -> faiss.Index:
+    try:
+        return faiss.read_index(faiss_index_path, INDEX_IO_FLAGS)
+    except RuntimeError:
+        # Index layouts that can't be memory-mapped are loaded onto the heap
+        return faiss.read_index(faiss_index_path)
+
+
+def _to_gpu(index: faiss.Index) -> faiss.Index:
+    """Move a large index onto the available GPUs, sharded across them.
+
+    Returns the index unchanged on CPU-only faiss builds, for small indexes,
+    and for index types faiss can't place on a GPU (such as HNSW).
+    """
+    if (
+        index.ntotal < GPU_MIN_VECTORS
+        or not hasattr(faiss, "index_cpu_to_all_gpus")
+        or faiss.get_num_gpus() == 0
+    ):
+        return index
+    options = faiss.GpuMultipleClonerOptions()
+    options.shard = True  # split rather than replicate, so larger indexes fit in VRAM
+    try:
+        return faiss.index_cpu_to_all_gpus(index, co=options)
+    except RuntimeError:
+        return index
+
+
+def _load_index(faiss_index_path: str) -> faiss.Index:
+    """Return the FAISS index at a path, reading it from disk only when not cached."""
+    return _cached_load(
+        _index_cache, faiss_index_path, lambda: _to_gpu(_read_index(faiss_index_path))
+    )
+
+
+def _read_json(path: str):
+    with open(path, "rb") as f:
+        return _json_loads(f.read())
+
+
+def _load_chunk_columns(columns_path: str) -> Dict[str, np.ndarray]:
+    with np.load(columns_path, allow_pickle=False) as columns:
+        return {name: columns[name] for name in columns.files}
+
+
+def _read_chunk_metadata(index_path: str, chunk_id: int) -> Tuple[Optional[dict], int]:
+    """Return ``(metadata for chunk_id or None if out of range, number of chunks)``.
+
+    Indexes with a ``chunks_metadata.npz`` are answered from its cached
+    columns; older indexes fall back to the cached, fully parsed JSON file.
+    """
+    columns_path = os.path.join(index_path, "chunks_metadata.npz")
+
+    if not os.path.exists(columns_path):
+        metadata_path = os.path.join(index_path, "chunks_metadata.json")
+        metadata = _cached_load(_metadata_cache, metadata_path, lambda: _read_json(metadata_path))
+        in_range = 0 <= chunk_id < len(metadata)
+        return (metadata[chunk_id] if in_range else None), len(metadata)
+
+    columns = _cached_load(_metadata_cache, columns_path, lambda: _load_chunk_columns(columns_path))
+    num_chunks = len(columns["filepath_ids"])
+    if not 0 <= chunk_id < num_chunks:
+        return None, num_chunks
+    return {
+        "filepath": str(columns["filepaths"][columns["filepath_ids"][chunk_id]]),
+        "startLine": int(columns["start_line"][chunk_id]),
+        "endLine": int(columns["end_line"][chunk_id]),
+        "startByte": int(columns["start_byte"][chunk_id]),
+        "endByte": int(columns["end_byte"][chunk_id]),
+    }, num_chunks
+
+
+class _SearchBatcher:
+    """Coalesces concurrent searches into batched embedding and FAISS calls.
+
+    Requests arriving within ``max_wait`` seconds of each other (up to
+    ``max_batch``) share one ``create_embedding`` call, and queries against
+    the same index share one ``index.search`` call. Running every query
+    through one worker thread also keeps the embedding model single-threaded.
+    """
+
+    def __init__(self, max_batch: int = 64, max_wait: float = 0.005):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        # Query vectors are embedded into this matrix, reused by every batch;
+        # only the worker thread touches it, and each batch is done with it
+        # before the next starts
+        self._query_buffer = None
+
+    def submit(self, faiss_index_path: str, prefixed_query: str, top_k: int) -> Future:
+        """Queue a search; the future resolves to the search response dict."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        future = Future()
+        self._queue.put((faiss_index_path, prefixed_query, top_k, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            try:
+                self._search_batch(batch)
+            except Exception as e:
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _search_batch(self, batch):
+        query_vectors = get_embeddings(
+            [query for _, query, _, _ in batch], buffer=self._query_buffer
+        )
+        if self._query_buffer is None:
+            self._query_buffer = np.empty(
+                (self.max_batch, query_vectors.shape[1]), dtype=np.float32
+            )
+
+        rows_by_index: Dict[str, list] = {}
+        for row, (faiss_index_path, *_) in enumerate(batch):
+            rows_by_index.setdefault(faiss_index_path, []).append(row)
+
+        for faiss_index_path, rows in rows_by_index.items():
+            futures = [batch[row][3] for row in rows]
+            top_ks = [batch[row][2] for row in rows]
+            try:
+                # Load FAISS index (cached across searches)
+                index = _load_index(faiss_index_path)
+
+                # Debug: check dimensions
+                if query_vectors.shape[1] != index.d:
+                    error = {
+                        "error": f"Dimension mismatch: query has {query_vectors.shape[1]} dimensions, index has {index.d} dimensions",
+                        "query_shape": str((1, query_vectors.shape[1])),
+                        "index_dimension": index.d,
+                        "query_embedding_shape": str((query_vectors.shape[1],)),
+                    }
+                    for future in futures:
+                        future.set_result(error)
+                    continue
+
+                # One search at the widest top_k serves every query in the group.
+                # HNSW indexes need a search beam at least as wide as top_k;
+                # indexes built before HNSW was introduced are flat and skip this.
+                # The beam is passed per call because the index is shared between threads.
+                k = max(top_ks)
+                params = None
+                if isinstance(index, faiss.IndexHNSW):
+                    params = faiss.SearchParametersHNSW(efSearch=max(HNSW_EF_SEARCH, k))
+
+                # Query vectors are already contiguous float32 on the host, which
+                # is what faiss consumes (GPU indexes upload them themselves); only
+                # take a subset copy when the batch spans several indexes
+                queries = query_vectors if len(rows) == len(batch) else query_vectors[rows]
+
+                # FAISS returns (distances/scores, indices/ids)
+                scores, ids = index.search(queries, k, params=params)
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            # Results are serialized by FastMCP's pydantic encoder, which can't
+            # encode ndarrays; convert the whole group in one call per array
+            # and slice the plain lists per query
+            id_rows = ids.tolist()
+            score_rows = scores.tolist()
+            for i, (future, top_k) in enumerate(zip(futures, top_ks)):
+                future.set_result(
+                    {
+                        "ids": [id_rows[i][:top_k]],
+                        "scores": [score_rows[i][:top_k]],
+                    }
+                )
+
+
+_search_batcher = _SearchBatcher()
 
 
 def _search_index(index_name: str, query: str, instruction_type: str, top_k: int = 10) -> dict[str, Any]:
@@ -154,27 +440,10 @@ def _search_index(index_name: str, query: str, instruction_type: str, top_k: int
         if not os.path.exists(faiss_index_path):
             return {"error": f"Index '{index_name}' not found"}
 
-        # Load FAISS index
-        index = faiss.read_index(faiss_index_path)
-
-        # Generate query embedding with appropriate prefix
+        # Generate query embedding with appropriate prefix; concurrent queries
+        # are embedded and searched together
         prefixed_query = INSTRUCTION_CONFIG[instruction_type]["query"] + query
-        query_embedding = get_embedding(prefixed_query)
-        query_vector = query_embedding.reshape(1, -1).astype("float32")
-
-        # Debug: check dimensions
-        if query_vector.shape[1] != index.d:
-            return {
-                "error": f"Dimension mismatch: query has {query_vector.shape[1]} dimensions, index has {index.d} dimensions",
-                "query_shape": str(query_vector.shape),
-                "index_dimension": index.d,
-                "query_embedding_shape": str(query_embedding.shape),
-            }
-
-        # Search the index
-        # FAISS returns (distances/scores, indices/ids)
-        scores, ids = index.search(query_vector, top_k)
-        return {"ids": ids.tolist(), "scores": scores.tolist()}
+        return _search_batcher.submit(faiss_index_path, prefixed_query, top_k).result()
     except Exception as e:
         return {
             "error": f"Error searching index: {str(e)}",
@@ -198,29 +467,45 @@ def _search_code(index_name: str, code_query: str, top_k: int = 10) -> dict[str,
     return _search_index(index_name, code_query, "code2code", top_k)
 
 
+def _read_source_bytes(full_path: str, start_byte: int, end_byte: int) -> bytes:
+    """Read a chunk's byte range from its source file.
+
+    Notebooks are indexed as converted Python under a synthetic ``.py`` path
+    that doesn't exist on disk, so those chunks are re-read from the notebook.
+    """
+    notebook_path = os.path.splitext(full_path)[0] + ".ipynb"
+    if not os.path.exists(full_path) and os.path.exists(notebook_path):
+        with open(notebook_path, "r", encoding="utf-8") as f:
+            python_content = convert_ipynb_to_python(f.read())
+        return python_content.encode("utf-8")[start_byte:end_byte]
+
+    # One positioned read; no buffered file object is needed for a single range
+    fd = os.open(full_path, os.O_RDONLY)
+    try:
+        return os.pread(fd, end_byte - start_byte, start_byte)
+    finally:
+        os.close(fd)
+
+
 def _get_chunk(index_name: str, chunk_id: int) -> dict:
     """Undecorated get_chunk function for internal/external use.
 
     Retrieves the content and metadata of a specific chunk by its ID.
     """
     try:
-        import json
-
         index_path = os.path.join(INDEXES_DIR, index_name)
         metadata_path = os.path.join(index_path, "chunks_metadata.json")
 
         if not os.path.exists(metadata_path):
             return {"error": f"Metadata file not found for index '{index_name}'"}
 
-        with open(metadata_path, "r", encoding="utf-8") as f:
-            metadata = json.load(f)
+        chunk_meta, num_chunks = _read_chunk_metadata(index_path, chunk_id)
 
-        if chunk_id < 0 or chunk_id >= len(metadata):
+        if chunk_meta is None:
             return {
-                "error": f"Chunk ID {chunk_id} out of range (0-{len(metadata) - 1})"
+                "error": f"Chunk ID {chunk_id} out of range (0-{num_chunks - 1})"
             }
 
-        chunk_meta = metadata[chunk_id]
         filepath = chunk_meta["filepath"]
         start_line = chunk_meta["startLine"]
         end_line = chunk_meta["endLine"]
@@ -230,9 +515,10 @@ def _get_chunk(index_name: str, chunk_id: int) -> dict:
 
         index_config_path = os.path.join(index_path, "index_config.json")
         if os.path.exists(index_config_path):
-            with open(index_config_path, "r", encoding="utf-8") as f:
-                index_config = json.load(f)
-                clone_path = index_config.get("original_repo_path")
+            index_config = _cached_load(
+                _metadata_cache, index_config_path, lambda: _read_json(index_config_path)
+            )
+            clone_path = index_config.get("original_repo_path")
 
         # If clone_path is still None, it means either index_config.json didn't exist
         # or didn't contain original_repo_path, so we fall back to CLONES_DIR logic
@@ -255,14 +541,11 @@ def _get_chunk(index_name: str, chunk_id: int) -> dict:
 
         full_path = os.path.join(clone_path, filepath)
 
-        # Read the specific bytes from the file using seek
+        # Read the specific bytes from the file
         start_byte = chunk_meta["startByte"]
         end_byte = chunk_meta["endByte"]
 
-        with open(full_path, "rb") as f:
-            f.seek(start_byte)
-            content_bytes = f.read(end_byte - start_byte)
-            content = content_bytes.decode("utf-8")
+        content = _read_source_bytes(full_path, start_byte, end_byte).decode("utf-8")
 
         return {
             "filepath": filepath,
@@ -3,6 +3,10 @@ This module provides utility functions for the code-context library.
 """
 
 import os
+import re
+from collections import deque
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
 from pathspec import PathSpec
@@ -106,68 +110,192 @@ SUPPORTED_EXTENSIONS = {
     ".thrift",
 }
 
+# Extensions walk_repo reads; notebooks are converted. Every entry is a single
+# ".ext", so one hash lookup on the text after a file's last dot decides.
+_SOURCE_EXTENSIONS = frozenset(SUPPORTED_EXTENSIONS | {".ipynb"})
 
-def _load_gitignore_patterns(repo_path: str) -> PathSpec:
-    """Loads .gitignore patterns from a repository path."""
-    patterns = []
-    for root, _, files in os.walk(repo_path):
-        if ".gitignore" in files:
-            gitignore_path = os.path.join(root, ".gitignore")
-            with open(gitignore_path, "r", encoding="utf-8") as f:
-                # Prepend the relative path from repo_path to each pattern
-                relative_dir = os.path.relpath(root, repo_path)
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith("#"):
-                        if relative_dir != ".":
-                            patterns.append(os.path.join(relative_dir, line))
-                        else:
-                            patterns.append(line)
-    return PathSpec.from_lines("gitwildmatch", patterns)
+# Number of file reads walk_repo keeps in flight ahead of its consumer
+READ_AHEAD = 64
+# Reads block on disk rather than the CPU, so use more threads than cores
+READ_WORKERS = min(32, (os.cpu_count() or 1) * 4)
 
 
-def walk_repo(repo_path, ignore_spec: Optional[PathSpec] = None):
-    """Walks a repository and yields the content and filepath of each file, filtering by extension and .gitignore."""
-    for root, _, files in os.walk(repo_path):
-        for file in files:
-            # Always ignore .git directories and .gitignore files themselves
-            if ".git" in root or file == ".gitignore":
+# pathspec names a group in every pattern's regex; the names would clash once
+# the patterns are joined into one alternation
+_NAMED_GROUP = re.compile(r"\(\?P<\w+>")
+
+
+def _compile_spec(spec: PathSpec):
+    """Compiles a PathSpec into a matcher returning True/False/None like ``check_file().include``.
+
+    Consecutive patterns with the same effect (ignore or re-include) are fused
+    into one regex, so a typical .gitignore without negations costs a single
+    regex search per path instead of one per pattern. Runs are tried last
+    first, keeping git's "last matching pattern wins" rule.
+    """
+    runs = []
+    for pattern in spec.patterns:
+        if pattern.include is None:
+            continue
+        source = _NAMED_GROUP.sub("(?:", pattern.regex.pattern)
+        if runs and runs[-1][0] == pattern.include:
+            runs[-1][1].append(source)
+        else:
+            runs.append((pattern.include, [source]))
+    compiled = [
+        (include, re.compile("|".join(f"(?:{source})" for source in sources)).search)
+        for include, sources in reversed(runs)
+    ]
+
+    def match(relative_path: str) -> Optional[bool]:
+        for include, search in compiled:
+            if search(relative_path) is not None:
+                return include
+        return None
+
+    return match
+
+
+@lru_cache(maxsize=1024)
+def _compile_gitignore(path: str, mtime_ns: int, size: int):
+    """Parses and compiles one .gitignore; cached until the file changes."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return _compile_spec(PathSpec.from_lines("gitwildmatch", f))
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def _read_gitignore(path: str):
+    """Returns the compiled matcher for one .gitignore, or None if it can't be read."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return _compile_gitignore(path, st.st_mtime_ns, st.st_size)
+
+
+def _is_ignored(specs, relative_path: str) -> bool:
+    """Checks a path against scoped (base_dir, matcher) pairs, outermost first.
+
+    As in git, the deepest .gitignore with a pattern matching the path decides,
+    so a nested negation can re-include what a parent ignored.
+    """
+    for base_dir, match in reversed(specs):
+        include = match(relative_path[len(base_dir):])
+        if include is not None:
+            return include
+    return False
+
+
+def _iter_source_files(repo_path, ignore_spec: Optional[PathSpec] = None):
+    """Yields (filepath, relative_path, file_ext) for every file walk_repo should read.
+
+    Walks depth-first with ``os.scandir``, in the same order as ``os.walk``,
+    and prunes .git and gitignored directories instead of descending into them.
+    Each .gitignore found on the way applies to its own directory's subtree,
+    on top of ``ignore_spec`` (matched against repo-relative paths).
+    """
+    root_specs = (("", _compile_spec(ignore_spec)),) if ignore_spec else ()
+    stack = [(repo_path, "", root_specs)]
+    while stack:
+        dir_path, relative_dir, specs = stack.pop()
+        try:
+            with os.scandir(dir_path) as it:
+                entries = list(it)
+        except OSError:
+            continue
+
+        for entry in entries:
+            if entry.name == ".gitignore" and entry.is_file():
+                spec = _read_gitignore(entry.path)
+                if spec is not None:
+                    specs = specs + ((relative_dir, spec),)
+                break
+
+        subdirs = []
+        for entry in entries:
+            name = entry.name
+            relative_path = relative_dir + name
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
                 continue
 
-            filepath = os.path.join(root, file)
-            relative_path = os.path.relpath(filepath, repo_path)
+            if is_dir:
+                # Always ignore .git directories; like os.walk, don't follow symlinks
+                if ".git" in name or entry.is_symlink():
+                    continue
+                if specs and _is_ignored(specs, relative_path + "/"):
+                    continue
+                subdirs.append((entry.path, relative_path + os.sep, specs))
+                continue
 
-            # Check against .gitignore patterns
-            if ignore_spec and ignore_spec.match_file(relative_path):
+            # Always ignore .gitignore files themselves
+            if name == ".gitignore":
                 continue
 
-            file_ext = os.path.splitext(file)[1].lower()
-
-            if file_ext == ".ipynb":
-                try:
-                    with open(filepath, "r", encoding="utf-8") as f:
-                        ipynb_content = f.read()
-                    python_content = convert_ipynb_to_python(ipynb_content)
-                    
-                    # Create a new .py filename in the same directory as the .ipynb file
-                    new_filepath = filepath.replace(".ipynb", ".py")
-                    
-                    with open(new_filepath, "w", encoding="utf-8") as f_py:
-                        f_py.write(python_content)
-                    
-                    # Yield the relative path and content of the newly created .py file
-                    yield os.path.relpath(new_filepath, repo_path), python_content
-                    
-                except Exception as e:
-                    print(f"Error converting .ipynb file {filepath}: {e}")
-                continue # Skip original .ipynb file
-
-            if file_ext not in SUPPORTED_EXTENSIONS:
+            # The extension check is cheaper than matching .gitignore patterns
+            dot = name.rfind(".")
+            if dot < 0:
+                continue
+            file_ext = name[dot:].lower()
+            if file_ext not in _SOURCE_EXTENSIONS:
                 continue
 
-            try:
-                with open(filepath, "r", encoding="utf-8") as f:
-                    yield relative_path, f.read()
-            except Exception:
-                # For simplicity, we'll just ignore files that we can't read.
-                pass
+            # Check against .gitignore patterns
+            if specs and _is_ignored(specs, relative_path):
+                continue
+
+            yield entry.path, relative_path, file_ext
+
+        # Pushed in reverse so subdirectories are walked in listing order
+        stack.extend(reversed(subdirs))
+
+
+def _read_source_file(repo_path, filepath, relative_path, file_ext):
+    """Reads one file for walk_repo, returning (relative_path, content) or None if unreadable."""
+    if file_ext == ".ipynb":
+        try:
+            with open(filepath, "r", encoding="utf-8") as f:
+                ipynb_content = f.read()
+            python_content = convert_ipynb_to_python(ipynb_content)
+
+            # Return the converted code under a synthetic .py path next to the
+            # notebook; nothing is written into the repository
+            return relative_path[: -len(file_ext)] + ".py", python_content
+
+        except Exception as e:
+            print(f"Error converting .ipynb file {filepath}: {e}")
+        return None  # Skip original .ipynb file
+
+    try:
+        with open(filepath, "r", encoding="utf-8") as f:
+            return relative_path, f.read()
+    except Exception:
+        # For simplicity, we'll just ignore files that we can't read.
+        return None
+
+
+def walk_repo(repo_path, ignore_spec: Optional[PathSpec] = None):
+    """Walks a repository and yields the content and filepath of each file, filtering by extension and .gitignore.
+
+    .gitignore files are picked up during the walk itself; ``ignore_spec``
+    adds extra repo-level patterns.
+
+    Reads are issued on a thread pool up to READ_AHEAD files ahead of the
+    consumer, so file I/O overlaps with downstream chunking. Files are still
+    yielded in walk order.
+    """
+    with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+        pending = deque()
+        for entry in _iter_source_files(repo_path, ignore_spec):
+            pending.append(executor.submit(_read_source_file, repo_path, *entry))
+            if len(pending) >= READ_AHEAD:
+                result = pending.popleft().result()
+                if result is not None:
+                    yield result
+        while pending:
+            result = pending.popleft().result()
+            if result is not None:
+                yield result
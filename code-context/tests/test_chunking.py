@@ -2,9 +2,16 @@
 Unit tests for the chunking module.
 """
 
+from unittest.mock import Mock, patch
+
 from code_context.chunking import (
+    FROZEN_SPLITTABLE,
+    SPLITTABLE_NODE_TYPES,
+    _get_cached_parser,
+    _parser_cache,
     chunk_document,
     chunk_document_ast,
+    chunk_document_bytes,
     convert_ipynb_to_python,
     get_language_from_filepath,
     normalize_language_name,
@@ -63,6 +70,54 @@ class TestChunkDocument:
         assert chunk["endByte"] > 0
 
 
+    def test_zero_overlap_advances(self):
+        """Test that an overlap smaller than a line yields disjoint, correctly numbered chunks."""
+        lines = [f"Line {i}" for i in range(10)]
+        chunks = chunk_document("\n".join(lines), chunk_size=30, chunk_overlap=1)
+
+        assert len(chunks) > 1
+        for chunk in chunks:
+            expected = "\n".join(lines[chunk["startLine"] - 1 : chunk["endLine"]])
+            assert chunk["content"] == expected
+        for prev, nxt in zip(chunks, chunks[1:]):
+            assert nxt["startLine"] == prev["endLine"] + 1
+
+
+class TestChunkDocumentBytes:
+    """Tests for the chunk_document_bytes function."""
+
+    def test_byte_offsets_are_exact(self):
+        """Test that byte offsets index back into the encoded document."""
+        document = "\n".join(f"línea {i} — ünïcode" for i in range(20)).encode("utf-8")
+        chunks = chunk_document_bytes(document, chunk_size=60, chunk_overlap=20)
+
+        assert len(chunks) > 1
+        for chunk in chunks:
+            raw = document[chunk["startByte"] : chunk["endByte"]]
+            assert raw.decode("utf-8").rstrip("\n") == chunk["content"]
+
+    def test_overlap_lines(self):
+        """Test that consecutive chunks share overlapping lines."""
+        document = "\n".join(f"Line {i}" for i in range(10)).encode("utf-8")
+        chunks = chunk_document_bytes(document, chunk_size=30, chunk_overlap=10)
+
+        assert len(chunks) >= 2
+        assert chunks[0]["endLine"] >= chunks[1]["startLine"]
+
+    def test_no_overlap(self):
+        """Test that a zero overlap produces disjoint chunks."""
+        document = "\n".join(f"Line {i}" for i in range(10)).encode("utf-8")
+        chunks = chunk_document_bytes(document, chunk_size=30, chunk_overlap=0)
+
+        for prev, nxt in zip(chunks, chunks[1:]):
+            assert nxt["startLine"] == prev["endLine"] + 1
+            assert nxt["startByte"] == prev["endByte"]
+
+    def test_empty_document(self):
+        """Test chunking an empty document."""
+        assert chunk_document_bytes(b"", chunk_size=100, chunk_overlap=10) == []
+
+
 class TestConvertIpynbToPython:
     """Tests for the convert_ipynb_to_python function."""
 
@@ -164,6 +219,11 @@ class TestNormalizeLanguageName:
         assert normalize_language_name("python") == "python"
         assert normalize_language_name("javascript") == "javascript"
 
+    def test_frozen_splittable_covers_aliases(self):
+        """Test that tree-sitter aliases resolve to their canonical node types."""
+        assert FROZEN_SPLITTABLE["c_sharp"] == frozenset(SPLITTABLE_NODE_TYPES["csharp"])
+        assert FROZEN_SPLITTABLE["tsx"] is FROZEN_SPLITTABLE["typescript"]
+
 
 class TestChunkDocumentAst:
     """Tests for the chunk_document_ast function."""
@@ -250,3 +310,31 @@ class TestRefineLargeChunks:
         # First chunk should remain unchanged, second should be split
         assert len(refined) > 2
         assert refined[0]["content"] == "small"
+
+
+@patch("code_context.chunking.get_parser", side_effect=lambda lang: Mock(name=lang))
+class TestParserCache:
+    """Tests for the per-thread tree-sitter parser cache."""
+
+    def setup_method(self):
+        _parser_cache.__dict__.clear()
+
+    def test_parser_reused_across_calls(self, mock_get_parser):
+        """Test that the same parser instance is returned for a language."""
+        assert _get_cached_parser("python") is _get_cached_parser("python")
+        mock_get_parser.assert_called_once_with("python")
+
+    def test_parser_per_language(self, mock_get_parser):
+        """Test that different languages get different parsers."""
+        assert _get_cached_parser("python") is not _get_cached_parser("javascript")
+
+    def test_parser_not_shared_across_threads(self, mock_get_parser):
+        """Test that each thread gets its own parser instance."""
+        import threading
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(_get_cached_parser("python")))
+        thread.start()
+        thread.join()
+
+        assert other[0] is not _get_cached_parser("python")
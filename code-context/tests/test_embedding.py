@@ -5,6 +5,7 @@ Unit tests for the embedding module.
 import numpy as np
 from unittest.mock import Mock, patch
 from code_context.embedding import (
+    EmbeddingCache,
     get_embedding,
     get_embeddings,
     INSTRUCTION_CONFIG,
@@ -29,6 +30,59 @@ class TestInstructionConfig:
             assert mode in INSTRUCTION_CONFIG
 
 
+class TestGetModel:
+    """Tests for lazy model loading."""
+
+    @patch("code_context.embedding.Llama")
+    def test_probes_output_layout_once(self, mock_llama, monkeypatch):
+        """Test that the embedding layout is probed at load and reused for batches."""
+        import code_context.embedding as embedding
+
+        monkeypatch.setattr(embedding, "_model", None)
+        monkeypatch.setattr(embedding, "_token_level_embeddings", None)
+        mock_model = Mock()
+        mock_model.tokenize.return_value = [0]
+        mock_model.create_embedding.side_effect = lambda texts: {
+            "data": [{"embedding": [[9.0, 9.0], [0.0, 2.0]]} for _ in np.atleast_1d(texts)]
+        }
+        mock_llama.from_pretrained.return_value = mock_model
+
+        assert embedding.get_model() is embedding.get_model()
+        mock_llama.from_pretrained.assert_called_once()
+        assert embedding._token_level_embeddings is True
+
+        results = get_embeddings(["a", "b"])
+        np.testing.assert_array_almost_equal(results, [[0.0, 1.0], [0.0, 1.0]])
+
+    @patch("code_context.embedding.Llama")
+    def test_warm_up_shares_single_load(self, mock_llama, monkeypatch):
+        """Test that get_model waits for an in-flight warm-up instead of loading again."""
+        import threading
+        import code_context.embedding as embedding
+
+        monkeypatch.setattr(embedding, "_model", None)
+        monkeypatch.setattr(embedding, "_token_level_embeddings", None)
+        release = threading.Event()
+        mock_model = Mock()
+        mock_model.create_embedding.return_value = {"data": [{"embedding": [1.0]}]}
+
+        def slow_load(*args, **kwargs):
+            release.wait(timeout=5)
+            return mock_model
+
+        mock_llama.from_pretrained.side_effect = slow_load
+
+        thread = embedding.warm_up_model()
+        waiter = threading.Thread(target=embedding.get_model)
+        waiter.start()
+        release.set()
+        thread.join(timeout=5)
+        waiter.join(timeout=5)
+
+        assert embedding.get_model() is mock_model
+        mock_llama.from_pretrained.assert_called_once()
+
+
 class TestGetEmbedding:
     """Tests for the get_embedding function."""
 
@@ -111,63 +165,287 @@ class TestGetEmbedding:
         np.testing.assert_array_equal(result, zero_vector)
 
 
+def _mock_batch_model(vectors, tokens_per_text=1):
+    """Build a mock model whose create_embedding echoes back per-text vectors."""
+    mock_model = Mock()
+    mock_model.tokenize.side_effect = lambda b: [0] * tokens_per_text
+    mock_model.create_embedding.side_effect = lambda batch: {
+        "data": [{"embedding": vectors[text].tolist()} for text in batch]
+    }
+    return mock_model
+
+
 class TestGetEmbeddings:
     """Tests for the get_embeddings function (batch processing)."""
 
-    @patch("code_context.embedding.get_embedding")
-    def test_batch_embedding_generation(self, mock_get_embedding):
-        """Test generating embeddings for multiple texts."""
-        # Mock embeddings for each text
-        mock_embeddings = [
-            np.array([0.1, 0.2, 0.3], dtype=np.float32),
-            np.array([0.4, 0.5, 0.6], dtype=np.float32),
-            np.array([0.7, 0.8, 0.9], dtype=np.float32),
-        ]
-        mock_get_embedding.side_effect = mock_embeddings
+    @patch("code_context.embedding.get_model")
+    def test_batch_embedding_generation(self, mock_get_model):
+        """Test generating embeddings for multiple texts in a single model call."""
+        vectors = {
+            "text1": np.array([3.0, 4.0, 0.0], dtype=np.float32),
+            "text2": np.array([0.0, 0.0, 2.0], dtype=np.float32),
+            "text3": np.array([1.0, 0.0, 0.0], dtype=np.float32),
+        }
+        mock_model = _mock_batch_model(vectors)
+        mock_get_model.return_value = mock_model
 
         texts = ["text1", "text2", "text3"]
         results = get_embeddings(texts)
 
-        # Verify all texts were processed
-        assert len(results) == 3
-        assert mock_get_embedding.call_count == 3
+        # All texts fit in one batch
+        mock_model.create_embedding.assert_called_once_with(texts)
+        assert results.shape == (3, 3)
+        assert results.dtype == np.float32
         for i, text in enumerate(texts):
-            np.testing.assert_array_equal(results[i], mock_embeddings[i])
+            expected = vectors[text] / np.linalg.norm(vectors[text])
+            np.testing.assert_array_almost_equal(results[i], expected, decimal=5)
+
+    @patch("code_context.embedding.get_model")
+    def test_batches_respect_token_budget(self, mock_get_model):
+        """Test that texts are split into batches when the token budget is exceeded."""
+        vectors = {f"text{i}": np.array([1.0, float(i)], dtype=np.float32) for i in range(5)}
+        mock_model = _mock_batch_model(vectors, tokens_per_text=20000)
+        mock_get_model.return_value = mock_model
 
-    @patch("code_context.embedding.get_embedding")
-    def test_empty_text_list(self, mock_get_embedding):
+        results = get_embeddings(list(vectors))
+
+        # 20000 tokens per text with a 32768 budget → one text per batch
+        assert mock_model.create_embedding.call_count == 5
+        assert results.shape == (5, 2)
+
+    @patch("code_context.embedding.get_model")
+    def test_multidimensional_embeddings_take_last(self, mock_get_model):
+        """Test that token-level embeddings in a batch use the last token."""
+        mock_model = Mock()
+        mock_model.tokenize.return_value = [0]
+        mock_model.create_embedding.return_value = {
+            "data": [{"embedding": [[1.0, 0.0], [0.0, 2.0]]}]
+        }
+        mock_get_model.return_value = mock_model
+
+        results = get_embeddings(["text"])
+
+        np.testing.assert_array_almost_equal(results[0], [0.0, 1.0], decimal=5)
+
+    @patch("code_context.embedding.get_model")
+    def test_empty_text_list(self, mock_get_model):
         """Test handling of empty text list."""
         results = get_embeddings([])
 
         assert len(results) == 0
-        mock_get_embedding.assert_not_called()
+        mock_get_model.assert_not_called()
 
-    @patch("code_context.embedding.get_embedding")
-    def test_progress_callback(self, mock_get_embedding):
-        """Test that progress callback is called correctly."""
-        mock_get_embedding.return_value = np.array([0.1, 0.2, 0.3], dtype=np.float32)
+    @patch("code_context.embedding.get_model")
+    def test_progress_callback(self, mock_get_model):
+        """Test that progress callback is called once per batch."""
+        vectors = {f"text{i}": np.array([0.1, 0.2, 0.3], dtype=np.float32) for i in range(3)}
+        mock_get_model.return_value = _mock_batch_model(vectors, tokens_per_text=16384)
 
         progress_calls = []
 
         def progress_callback(current, total):
             progress_calls.append((current, total))
 
-        texts = ["text1", "text2", "text3"]
-        get_embeddings(texts, progress_callback=progress_callback)
+        get_embeddings(list(vectors), progress_callback=progress_callback)
+
+        # Two texts fit in the first batch, the third goes in a second batch
+        assert progress_calls == [(2, 3), (3, 3)]
+
+    @patch("code_context.embedding.get_model")
+    def test_zero_vector_handling(self, mock_get_model):
+        """Test that zero vectors in a batch do not cause division by zero."""
+        vectors = {
+            "empty": np.array([0.0, 0.0], dtype=np.float32),
+            "text": np.array([0.0, 5.0], dtype=np.float32),
+        }
+        mock_get_model.return_value = _mock_batch_model(vectors)
+
+        results = get_embeddings(["empty", "text"])
+
+        np.testing.assert_array_equal(results[0], [0.0, 0.0])
+        np.testing.assert_array_almost_equal(results[1], [0.0, 1.0], decimal=5)
+
+    @patch("code_context.embedding.get_model")
+    def test_duplicate_texts_embedded_once(self, mock_get_model):
+        """Test that repeated texts reach the model once and fill every row."""
+        vectors = {
+            "header": np.array([3.0, 4.0], dtype=np.float32),
+            "body": np.array([0.0, 2.0], dtype=np.float32),
+        }
+        mock_model = _mock_batch_model(vectors)
+        mock_get_model.return_value = mock_model
 
-        # Verify progress callback was called for each text
-        assert len(progress_calls) == 3
-        assert progress_calls[0] == (1, 3)
-        assert progress_calls[1] == (2, 3)
-        assert progress_calls[2] == (3, 3)
+        progress_calls = []
+        results = get_embeddings(
+            ["header", "body", "header", "header"],
+            progress_callback=lambda current, total: progress_calls.append((current, total)),
+        )
+
+        mock_model.create_embedding.assert_called_once_with(["header", "body"])
+        assert results.shape == (4, 2)
+        for row in (0, 2, 3):
+            np.testing.assert_array_almost_equal(results[row], [0.6, 0.8], decimal=5)
+        np.testing.assert_array_almost_equal(results[1], [0.0, 1.0], decimal=5)
+        assert progress_calls[-1] == (4, 4)
 
-    @patch("code_context.embedding.get_embedding")
-    def test_single_text(self, mock_get_embedding):
-        """Test processing a single text."""
-        mock_embedding = np.array([0.1, 0.2, 0.3], dtype=np.float32)
-        mock_get_embedding.return_value = mock_embedding
+    @patch("code_context.embedding.get_model")
+    def test_buffer_reused(self, mock_get_model):
+        """Test that results are written into a caller-provided buffer when it fits."""
+        vectors = {f"text{i}": np.array([float(i), 1.0], dtype=np.float32) for i in range(3)}
+        mock_get_model.return_value = _mock_batch_model(vectors)
+        buffer = np.zeros((4, 2), dtype=np.float32)
 
-        results = get_embeddings(["single text"])
+        results = get_embeddings(list(vectors), buffer=buffer)
+
+        assert results.shape == (3, 2)
+        assert np.shares_memory(results, buffer)
+        np.testing.assert_almost_equal(np.linalg.norm(buffer[:3], axis=1), 1.0, decimal=5)
+
+        # A buffer that is too small is left alone
+        small = np.zeros((2, 2), dtype=np.float32)
+        results = get_embeddings(list(vectors), buffer=small)
+        assert not np.shares_memory(results, small)
+
+    @patch("code_context.embedding.get_model")
+    def test_out_path_writes_memmap(self, mock_get_model, tmp_path):
+        """Test that embeddings are streamed into a file-backed matrix."""
+        vectors = {f"text{i}": np.array([float(i), 1.0], dtype=np.float32) for i in range(3)}
+        mock_get_model.return_value = _mock_batch_model(vectors, tokens_per_text=16384)
+        out_path = tmp_path / "embeddings.f32"
 
-        assert len(results) == 1
-        np.testing.assert_array_equal(results[0], mock_embedding)
+        results = get_embeddings(list(vectors), out_path=str(out_path))
+
+        assert isinstance(results, np.memmap)
+        assert results.shape == (3, 2)
+        on_disk = np.fromfile(out_path, dtype=np.float32).reshape(3, 2)
+        np.testing.assert_array_almost_equal(on_disk, results)
+        np.testing.assert_almost_equal(np.linalg.norm(on_disk, axis=1), 1.0, decimal=5)
+
+
+class TestEmbeddingCache:
+    """Tests for the persistent embedding cache used by get_embeddings."""
+
+    @patch("code_context.embedding.get_model")
+    def test_cache_hits_skip_model(self, mock_get_model, tmp_path):
+        """Test that a second call with the same texts is served from the cache."""
+        vectors = {
+            "text1": np.array([3.0, 4.0], dtype=np.float32),
+            "text2": np.array([0.0, 2.0], dtype=np.float32),
+        }
+        mock_model = _mock_batch_model(vectors)
+        mock_get_model.return_value = mock_model
+
+        first = get_embeddings(["text1", "text2"], cache_dir=str(tmp_path))
+        assert mock_model.create_embedding.call_count == 1
+
+        second = get_embeddings(["text2", "text1"], cache_dir=str(tmp_path))
+        assert mock_model.create_embedding.call_count == 1
+        np.testing.assert_array_equal(second, first[::-1])
+
+    @patch("code_context.embedding.get_model")
+    def test_only_misses_are_embedded(self, mock_get_model, tmp_path):
+        """Test that only uncached texts are sent to the model."""
+        vectors = {
+            "cached": np.array([1.0, 0.0], dtype=np.float32),
+            "new": np.array([0.0, 1.0], dtype=np.float32),
+        }
+        mock_model = _mock_batch_model(vectors)
+        mock_get_model.return_value = mock_model
+
+        get_embeddings(["cached"], cache_dir=str(tmp_path))
+        progress_calls = []
+        results = get_embeddings(
+            ["cached", "new"],
+            progress_callback=lambda done, total: progress_calls.append((done, total)),
+            cache_dir=str(tmp_path),
+        )
+
+        mock_model.create_embedding.assert_called_with(["new"])
+        np.testing.assert_array_almost_equal(results, [[1.0, 0.0], [0.0, 1.0]])
+        assert progress_calls == [(1, 2), (2, 2)]
+
+    def test_concurrent_writers_share_directory(self, tmp_path, monkeypatch):
+        """Test that a store racing another writer on the same directory keeps rows aligned."""
+        import builtins
+        import threading
+
+        from code_context import embedding
+
+        first_stored = threading.Event()
+        second_done = threading.Event()
+
+        class PausingFile:
+            """Holds the first writer mid-store, until the second writer is done (or 1s)."""
+
+            def __init__(self, f):
+                self._f = f
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                self._f.close()
+
+            def __getattr__(self, name):
+                return getattr(self._f, name)
+
+            def write(self, data):
+                first_stored.set()
+                second_done.wait(timeout=1)
+                return self._f.write(data)
+
+        def open_vectors(path, mode="r", *args, **kwargs):
+            f = builtins.open(path, mode, *args, **kwargs)
+            if mode == "ab" and threading.current_thread().name == "first":
+                return PausingFile(f)
+            return f
+
+        monkeypatch.setattr(embedding, "open", open_vectors, raising=False)
+
+        def store(name, value):
+            cache = EmbeddingCache(str(tmp_path))
+            try:
+                cache.store([name.encode()], np.full((1, 4), value, dtype=np.float32))
+            finally:
+                cache.close()
+
+        store("seed", 0.0)
+        first = threading.Thread(target=store, args=("first", 1.0), name="first")
+        first.start()
+        first_stored.wait(timeout=5)
+        store("second", 2.0)
+        second_done.set()
+        first.join()
+
+        cache = EmbeddingCache(str(tmp_path))
+        try:
+            found = cache.lookup([b"seed", b"first", b"second"])
+        finally:
+            cache.close()
+        np.testing.assert_array_equal(found[b"seed"], [0.0] * 4)
+        np.testing.assert_array_equal(found[b"first"], [1.0] * 4)
+        np.testing.assert_array_equal(found[b"second"], [2.0] * 4)
+
+    @patch("code_context.embedding.get_model")
+    def test_misses_are_stored_batch_by_batch(self, mock_get_model, tmp_path):
+        """Test that write-back never gathers more than one model batch of rows."""
+        vectors = {f"text{i}": np.array([float(i), 1.0], dtype=np.float32) for i in range(5)}
+        # Two texts fill the token budget, so five texts take three batches
+        mock_get_model.return_value = _mock_batch_model(vectors, tokens_per_text=16384)
+
+        with patch.object(
+            EmbeddingCache, "store", autospec=True, side_effect=EmbeddingCache.store
+        ) as store:
+            results = get_embeddings(
+                list(vectors), cache_dir=str(tmp_path), out_path=str(tmp_path / "out.f32")
+            )
+
+        assert [len(call.args[1]) for call in store.call_args_list] == [2, 2, 1]
+        again = get_embeddings(list(vectors), cache_dir=str(tmp_path))
+        np.testing.assert_array_equal(again, results)
+
+    def test_key_includes_model_id(self):
+        """Test that cache keys are namespaced by the embedding model."""
+        with patch("code_context.embedding.MODEL_ID", "other-model"):
+            other_key = EmbeddingCache.key("text")
+        assert EmbeddingCache.key("text") != other_key
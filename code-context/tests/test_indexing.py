@@ -0,0 +1,42 @@
+"""
+Unit tests for the indexing module.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from code_context.indexing import CHUNK_BATCH, _chunk_in_order
+
+
+class TestChunkInOrder:
+    """Tests for the bounded, order-preserving chunking fan-out."""
+
+    def test_walk_is_consumed_lazily(self):
+        """Only a bounded number of files are pulled before the first result."""
+        consumed = []
+
+        def files():
+            for i in range(1000):
+                consumed.append(i)
+                yield f"file_{i}.py", f"x = {i}\n"
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = _chunk_in_order(executor, files(), max_pending=4)
+            first_path, _ = next(results)
+            assert first_path == "file_0.py"
+            assert len(consumed) <= 4 * CHUNK_BATCH
+            results.close()
+
+    def test_results_keep_walk_order(self):
+        """Results come back in walk order across batch boundaries."""
+        items = [(f"file_{i}.py", f"x = {i}\n") for i in range(3 * CHUNK_BATCH + 1)]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(_chunk_in_order(executor, items, max_pending=2))
+
+        assert [path for path, _ in results] == [path for path, _ in items]
+        assert all(chunks for _, chunks in results)
+
+    def test_empty_walk(self):
+        """An empty walk yields nothing."""
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            assert list(_chunk_in_order(executor, [], max_pending=2)) == []
@@ -7,7 +7,8 @@ import tempfile
 from pathspec import PathSpec
 from code_context.utils import (
     SUPPORTED_EXTENSIONS,
-    _load_gitignore_patterns,
+    _compile_spec,
+    _iter_source_files,
     walk_repo,
 )
 
@@ -31,58 +32,86 @@ class TestSupportedExtensions:
         assert config_extensions.issubset(SUPPORTED_EXTENSIONS)
 
 
-class TestLoadGitignorePatterns:
-    """Tests for the _load_gitignore_patterns function."""
+class TestGitignorePatterns:
+    """Tests for the .gitignore files picked up by _iter_source_files."""
+
+    @staticmethod
+    def _relative_paths(repo_path):
+        return sorted(
+            relative_path.replace(os.sep, "/")
+            for _, relative_path, _ in _iter_source_files(repo_path)
+        )
 
     def test_empty_directory(self):
-        """Test loading gitignore patterns from a directory without .gitignore."""
+        """Test that nothing is ignored in a directory without .gitignore."""
         with tempfile.TemporaryDirectory() as tmpdir:
-            spec = _load_gitignore_patterns(tmpdir)
-            assert isinstance(spec, PathSpec)
-            # Should be empty or have no patterns
-            assert not spec.match_file("test.py")
+            with open(os.path.join(tmpdir, "test.py"), "w") as f:
+                f.write("x = 1")
+
+            assert self._relative_paths(tmpdir) == ["test.py"]
 
     def test_single_gitignore(self):
         """Test loading patterns from a single .gitignore file."""
         with tempfile.TemporaryDirectory() as tmpdir:
-            gitignore_path = os.path.join(tmpdir, ".gitignore")
-            with open(gitignore_path, "w") as f:
-                f.write("*.pyc\n")
+            with open(os.path.join(tmpdir, ".gitignore"), "w") as f:
+                f.write("*.tmp.py\n")
                 f.write("__pycache__/\n")
+            os.makedirs(os.path.join(tmpdir, "__pycache__"))
+            for relative_path in ["test.tmp.py", "__pycache__/module.py", "test.py"]:
+                with open(os.path.join(tmpdir, relative_path), "w") as f:
+                    f.write("x = 1")
 
-            spec = _load_gitignore_patterns(tmpdir)
-            assert spec.match_file("test.pyc")
-            assert spec.match_file("__pycache__/module.py")
-            assert not spec.match_file("test.py")
+            assert self._relative_paths(tmpdir) == ["test.py"]
 
     def test_nested_gitignore(self):
         """Test loading patterns from nested .gitignore files."""
         with tempfile.TemporaryDirectory() as tmpdir:
             # Root .gitignore
             with open(os.path.join(tmpdir, ".gitignore"), "w") as f:
-                f.write("*.log\n")
+                f.write("*.log.py\n")
 
             # Nested directory with its own .gitignore
             nested_dir = os.path.join(tmpdir, "subdir")
             os.makedirs(nested_dir)
             with open(os.path.join(nested_dir, ".gitignore"), "w") as f:
-                f.write("*.tmp\n")
+                f.write("*.tmp.py\n")
+
+            for relative_path in ["test.log.py", "test.tmp.py", "subdir/test.tmp.py", "subdir/test.py"]:
+                with open(os.path.join(tmpdir, relative_path), "w") as f:
+                    f.write("x = 1")
 
-            spec = _load_gitignore_patterns(tmpdir)
-            assert spec.match_file("test.log")
-            assert spec.match_file("subdir/test.tmp")
+            # The nested pattern only applies inside subdir
+            assert self._relative_paths(tmpdir) == ["subdir/test.py", "test.tmp.py"]
 
     def test_comment_lines_ignored(self):
         """Test that comment lines in .gitignore are ignored."""
         with tempfile.TemporaryDirectory() as tmpdir:
-            gitignore_path = os.path.join(tmpdir, ".gitignore")
-            with open(gitignore_path, "w") as f:
+            with open(os.path.join(tmpdir, ".gitignore"), "w") as f:
                 f.write("# This is a comment\n")
-                f.write("*.pyc\n")
+                f.write("*.tmp.py\n")
                 f.write("# Another comment\n")
+            for relative_path in ["test.tmp.py", "# This is a comment.py"]:
+                with open(os.path.join(tmpdir, relative_path), "w") as f:
+                    f.write("x = 1")
 
-            spec = _load_gitignore_patterns(tmpdir)
-            assert spec.match_file("test.pyc")
+            assert self._relative_paths(tmpdir) == ["# This is a comment.py"]
+
+
+class TestCompileSpec:
+    """Tests for the _compile_spec function."""
+
+    def test_matches_pathspec(self):
+        """Test that the fused matcher agrees with PathSpec, negations included."""
+        spec = PathSpec.from_lines(
+            "gitwildmatch",
+            ["*.log", "build/", "!important.log", "# comment", "tmp", "!tmp/keep/"],
+        )
+        match = _compile_spec(spec)
+        for path in [
+            "a.log", "important.log", "sub/important.log", "build/", "build/x.py",
+            "src/build/", "tmp", "tmp/", "tmp/keep/", "tmp/other/", "main.py",
+        ]:
+            assert match(path) == spec.check_file(path).include, path
 
 
 class TestWalkRepo:
@@ -147,14 +176,53 @@ class TestWalkRepo:
             with open(os.path.join(ignored_dir, "ignored.py"), "w") as f:
                 f.write("ignored code")
 
-            spec = _load_gitignore_patterns(tmpdir)
-            results = list(walk_repo(tmpdir, ignore_spec=spec))
+            results = list(walk_repo(tmpdir))
             filenames = [os.path.basename(path) for path, _ in results]
 
             assert "test.py" in filenames
             assert "test.pyc" not in filenames
             assert "ignored.py" not in filenames
 
+    def test_extra_ignore_spec(self):
+        """Test that ignore_spec patterns apply on top of the repo's .gitignore files."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(os.path.join(tmpdir, ".gitignore"), "w") as f:
+                f.write("*.tmp.py\n")
+            os.makedirs(os.path.join(tmpdir, "vendor"))
+            for relative_path in ["main.py", "main.tmp.py", "vendor/lib.py"]:
+                with open(os.path.join(tmpdir, relative_path), "w") as f:
+                    f.write("x = 1")
+
+            spec = PathSpec.from_lines("gitwildmatch", ["vendor/"])
+            paths = sorted(path.replace(os.sep, "/") for path, _ in walk_repo(tmpdir, ignore_spec=spec))
+
+            assert paths == ["main.py"]
+
+    def test_nested_gitignore_discovered_during_walk(self):
+        """Test that nested .gitignore files apply to their own subtree only."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(os.path.join(tmpdir, ".gitignore"), "w") as f:
+                f.write("*.log.py\nbuild/\n")
+            nested_dir = os.path.join(tmpdir, "pkg", "deep")
+            os.makedirs(nested_dir)
+            os.makedirs(os.path.join(tmpdir, "build"))
+            with open(os.path.join(tmpdir, "pkg", ".gitignore"), "w") as f:
+                f.write("*.tmp.py\n!keep.log.py\n")
+
+            for relative_path in [
+                "main.tmp.py",
+                "pkg/deep/skip.tmp.py",
+                "pkg/deep/keep.log.py",
+                "pkg/deep/drop.log.py",
+                "build/out.py",
+            ]:
+                with open(os.path.join(tmpdir, relative_path), "w") as f:
+                    f.write("x = 1")
+
+            paths = sorted(path.replace(os.sep, "/") for path, _ in walk_repo(tmpdir))
+
+            assert paths == ["main.tmp.py", "pkg/deep/keep.log.py"]
+
     def test_git_directory_excluded(self):
         """Test that .git directories are always excluded."""
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -208,9 +276,12 @@ class TestWalkRepo:
             # Should yield the converted .py file
             assert len(results) == 1
             filepath, content = results[0]
-            assert filepath.endswith(".py")
+            assert filepath == "test.py"
             assert "x = 42" in content
 
+            # The conversion stays in memory; the repository is left untouched
+            assert os.listdir(tmpdir) == ["test.ipynb"]
+
     def test_nested_directory_structure(self):
         """Test walking a nested directory structure."""
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -228,3 +299,16 @@ class TestWalkRepo:
             assert len(paths) == 2
             assert any("main.py" in path for path in paths)
             assert any("helper.py" in path for path in paths)
+
+    def test_read_ahead_preserves_walk_order(self):
+        """Test that prefetched reads are yielded in walk order."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for i in range(150):
+                with open(os.path.join(tmpdir, f"file{i:03d}.py"), "w") as f:
+                    f.write(f"x = {i}")
+
+            walked = [os.path.relpath(fp, tmpdir) for fp, _, _ in _iter_source_files(tmpdir)]
+            results = list(walk_repo(tmpdir))
+
+            assert [path for path, _ in results] == walked
+            assert all(content == f"x = {int(path[4:7])}" for path, content in results)
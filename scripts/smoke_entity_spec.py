@@ -16,30 +16,75 @@ Usage:
 
 from __future__ import annotations
 
+import asyncio
+import json
 import os
 import sys
 
 import httpx
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Specs can run to megabytes; orjson decodes them several times faster when installed
+_json_loads = orjson.loads if orjson is not None else json.loads
+
 # ── Fetch from live server ──────────────────────────────────────────────────
 
 API_URL = os.environ.get("PS_API_URL", "http://localhost:8080")
 
 
-def fetch_specs() -> tuple[dict, dict | None]:
-    """Fetch OpenAPI spec and entity-spec from the running API."""
+def _registry_sections(spec: dict) -> dict:
+    """Keep only the parts of an OpenAPI spec that EntityRegistry reads.
+
+    Examples, shared responses, tags and vendor extensions are dropped right
+    after decoding, so sanitizing never walks them.
+    """
+    sections = {"paths": spec.get("paths") or {}}
+    schemas = (spec.get("components") or {}).get("schemas")
+    if schemas is not None:
+        sections["components"] = {"schemas": schemas}
+    return sections
+
+
+# API URLs whose server has no /entity-spec endpoint; later fetches skip the request
+_NO_ENTITY_SPEC: set[str] = set()
+
+
+async def fetch_specs() -> tuple[dict, dict | None]:
+    """Fetch OpenAPI spec and entity-spec from the running API.
+
+    Both requests are issued concurrently over one client, so the second
+    one reuses the connection instead of paying its own setup. A server
+    that answered 404/405 for /entity-spec is not asked again.
+    """
     print(f"Connecting to {API_URL} ...")
 
-    openapi = httpx.get(f"{API_URL}/openapi.json", timeout=15.0)
+    skip_entity_spec = API_URL in _NO_ENTITY_SPEC
+    async with httpx.AsyncClient(base_url=API_URL, timeout=15.0) as client:
+        if skip_entity_spec:
+            openapi, resp = await client.get("/openapi.json"), None
+        else:
+            openapi, resp = await asyncio.gather(
+                client.get("/openapi.json"),
+                client.get("/entity-spec"),
+            )
+
     openapi.raise_for_status()
-    openapi_spec = openapi.json()
+    openapi_spec = _registry_sections(_json_loads(openapi.content))
 
     entity_spec = None
+    if resp is None:
+        print("  /entity-spec not supported by this server — skipping")
+        return openapi_spec, entity_spec
     try:
-        resp = httpx.get(f"{API_URL}/entity-spec", timeout=15.0)
         resp.raise_for_status()
-        entity_spec = resp.json()
+        entity_spec = _json_loads(resp.content)
     except httpx.HTTPStatusError as e:
+        if e.response.status_code in (404, 405):
+            _NO_ENTITY_SPEC.add(API_URL)
         print(f"  /entity-spec returned {e.response.status_code} — skipping")
 
     return openapi_spec, entity_spec
@@ -50,6 +95,9 @@ def fetch_specs() -> tuple[dict, dict | None]:
 from openfilter_mcp.server import sanitize_openapi_spec  # noqa: E402
 from openfilter_mcp.entity_tools import EntityRegistry  # noqa: E402
 
+# Shared fallback for a spec without "paths"; never mutated
+_EMPTY_DICT: dict = {}
+
 
 # ── Display helpers ─────────────────────────────────────────────────────────
 
@@ -62,9 +110,31 @@ DIM = "\033[2m"
 RESET = "\033[0m"
 
 
-def _col(text: str, width: int) -> str:
-    """Left-pad/truncate text to fixed width."""
-    return text[:width].ljust(width)
+# Entity table column widths
+_W_NAME, _W_SCOPE, _W_RBAC, _W_CNT = 28, 16, 22, 5
+
+# One entity-table row: name, scope cell, RBAC domain, op count, actions. The
+# format specs pad and truncate each column, so no per-column slicing is needed.
+# The scope cell is passed in pre-padded because its color codes inflate len().
+_ROW_FMT = f"{{:<{_W_NAME}.{_W_NAME}}}{{}}{{:<{_W_RBAC}.{_W_RBAC}}}{{:<{_W_CNT}.{_W_CNT}}}{{}}"
+
+# Scopes worth highlighting in the entity table; others are printed plain
+_SCOPE_FMT = {
+    "unknown": f"{DIM}{{}}{RESET}",
+    "global": f"{YELLOW}{{}}{RESET}",
+}
+
+
+def _scope_cell(scope: str) -> str:
+    """Render the scope column, padded to its width outside the color codes."""
+    colored = _SCOPE_FMT.get(scope, "{}").format(scope)
+    width = _W_SCOPE + len(colored) - len(scope)
+    return colored[:width].ljust(width)
+
+
+def _write_lines(lines: list[str]) -> None:
+    """Write a whole section to stdout at once instead of one print per line."""
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def print_entity_table(title: str, registry: EntityRegistry) -> None:
@@ -74,77 +144,75 @@ def print_entity_table(title: str, registry: EntityRegistry) -> None:
         print(f"\n{BOLD}{title}{RESET}: (no entities)\n")
         return
 
-    # Column widths
-    W_NAME, W_SCOPE, W_RBAC, W_CNT = 28, 16, 22, 5
-
-    print(f"\n{BOLD}{title}{RESET}  ({len(entities)} entities)")
-    header = (
-        f"  {CYAN}{_col('Entity', W_NAME)}"
-        f"{_col('Scope', W_SCOPE)}"
-        f"{_col('RBAC Domain', W_RBAC)}"
-        f"{_col('#Ops', W_CNT)}"
-        f"Actions{RESET}"
-    )
-    print(header)
-    print(f"  {'─' * 100}")
+    lines = [
+        f"\n{BOLD}{title}{RESET}  ({len(entities)} entities)",
+        f"  {CYAN}{_ROW_FMT.format('Entity', _scope_cell('Scope'), 'RBAC Domain', '#Ops', 'Actions')}{RESET}",
+        f"  {'─' * 100}",
+    ]
 
+    # Registries use a handful of scopes; render each one's cell once
+    scope_cells = {scope: _scope_cell(scope) for scope in {e.scope for _, e in entities}}
+    row = ("  " + _ROW_FMT).format
     for name, entity in entities:
-        actions = sorted(entity.operations.keys())
-        action_str = ", ".join(actions)
-        scope_colored = entity.scope
-        if entity.scope == "unknown":
-            scope_colored = f"{DIM}{entity.scope}{RESET}"
-        elif entity.scope == "global":
-            scope_colored = f"{YELLOW}{entity.scope}{RESET}"
-
-        print(
-            f"  {_col(name, W_NAME)}"
-            f"{_col(scope_colored, W_SCOPE + (len(scope_colored) - len(entity.scope)))}"
-            f"{_col(entity.rbac_domain or '—', W_RBAC)}"
-            f"{_col(str(len(actions)), W_CNT)}"
-            f"{action_str}"
+        actions = sorted(entity.operations)
+        lines.append(
+            row(
+                name,
+                scope_cells[entity.scope],
+                entity.rbac_domain or "—",
+                str(len(actions)),
+                ", ".join(actions),
+            )
         )
-    print()
+    lines.append("")
+    _write_lines(lines)
 
 
 def print_diff(primary: EntityRegistry, fallback: EntityRegistry) -> None:
     """Print differences between entity-spec and OpenAPI-fallback registries."""
-    p_names = set(primary.entities.keys())
-    f_names = set(fallback.entities.keys())
-
-    only_primary = sorted(p_names - f_names)
-    only_fallback = sorted(f_names - p_names)
-    common = sorted(p_names & f_names)
+    p_ops = {name: frozenset(e.operations) for name, e in primary.entities.items()}
+    f_ops = {name: frozenset(e.operations) for name, e in fallback.entities.items()}
 
-    print(f"{BOLD}Comparison: entity-spec vs OpenAPI fallback{RESET}")
-    print(f"  Entity-spec entities:  {len(p_names)}")
-    print(f"  OpenAPI-fallback entities: {len(f_names)}")
-    print(f"  Common:                {len(common)}")
+    # One pass over the sorted union of names fills every bucket
+    only_primary: list[str] = []
+    only_fallback: list[str] = []
+    common: list[str] = []
+    mismatches = []
+    for name in sorted(p_ops.keys() | f_ops.keys()):
+        p_actions = p_ops.get(name)
+        f_actions = f_ops.get(name)
+        if f_actions is None:
+            only_primary.append(name)
+        elif p_actions is None:
+            only_fallback.append(name)
+        else:
+            common.append(name)
+            if p_actions != f_actions:
+                mismatches.append((name, p_actions, f_actions))
+
+    lines = [
+        f"{BOLD}Comparison: entity-spec vs OpenAPI fallback{RESET}",
+        f"  Entity-spec entities:  {len(p_ops)}",
+        f"  OpenAPI-fallback entities: {len(f_ops)}",
+        f"  Common:                {len(common)}",
+    ]
 
     if only_primary:
-        print(f"\n  {GREEN}Only in entity-spec ({len(only_primary)}):{RESET}")
+        lines.append(f"\n  {GREEN}Only in entity-spec ({len(only_primary)}):{RESET}")
         for name in only_primary:
             e = primary.entities[name]
             actions = sorted(e.operations.keys())
-            print(f"    + {name}  [{e.scope}]  {', '.join(actions)}")
+            lines.append(f"    + {name}  [{e.scope}]  {', '.join(actions)}")
 
     if only_fallback:
-        print(f"\n  {YELLOW}Only in OpenAPI fallback ({len(only_fallback)}):{RESET}")
+        lines.append(f"\n  {YELLOW}Only in OpenAPI fallback ({len(only_fallback)}):{RESET}")
         for name in only_fallback:
             e = fallback.entities[name]
             actions = sorted(e.operations.keys())
-            print(f"    - {name}  {', '.join(actions)}")
-
-    # Action-level diff for common entities
-    mismatches = []
-    for name in common:
-        p_actions = set(primary.entities[name].operations.keys())
-        f_actions = set(fallback.entities[name].operations.keys())
-        if p_actions != f_actions:
-            mismatches.append((name, p_actions, f_actions))
+            lines.append(f"    - {name}  {', '.join(actions)}")
 
     if mismatches:
-        print(f"\n  {YELLOW}Action mismatches ({len(mismatches)}):{RESET}")
+        lines.append(f"\n  {YELLOW}Action mismatches ({len(mismatches)}):{RESET}")
         for name, p_acts, f_acts in mismatches:
             only_p = sorted(p_acts - f_acts)
             only_f = sorted(f_acts - p_acts)
@@ -153,12 +221,13 @@ def print_diff(primary: EntityRegistry, fallback: EntityRegistry) -> None:
                 parts.append(f"{GREEN}+entity-spec: {', '.join(only_p)}{RESET}")
             if only_f:
                 parts.append(f"{YELLOW}+fallback: {', '.join(only_f)}{RESET}")
-            print(f"    {name}: {' | '.join(parts)}")
+            lines.append(f"    {name}: {' | '.join(parts)}")
 
     if not only_primary and not only_fallback and not mismatches:
-        print(f"\n  {GREEN}Registries are identical.{RESET}")
+        lines.append(f"\n  {GREEN}Registries are identical.{RESET}")
 
-    print()
+    lines.append("")
+    _write_lines(lines)
 
 
 # ── Validation ──────────────────────────────────────────────────────────────
@@ -203,17 +272,17 @@ def validate(primary: EntityRegistry, entity_spec: dict | None) -> list[str]:
 
 
 def main() -> int:
-    openapi_raw, entity_spec = fetch_specs()
+    openapi_raw, entity_spec = asyncio.run(fetch_specs())
     openapi_spec = sanitize_openapi_spec(openapi_raw)
 
-    path_count = len(openapi_spec.get("paths", {}))
+    paths = openapi_spec.get("paths") or _EMPTY_DICT
+    path_count = len(paths)
     entity_count = len(entity_spec.get("entities", [])) if entity_spec else 0
     print(f"  OpenAPI paths: {path_count}")
     print(f"  Entity-spec entities: {entity_count}")
 
-    # Build registries
-    primary = EntityRegistry(openapi_spec, entity_spec=entity_spec)
-    fallback = EntityRegistry(openapi_spec)  # OpenAPI-only
+    # Build registries (entity-spec primary, OpenAPI-only fallback)
+    primary, fallback = EntityRegistry.build_pair(openapi_spec, entity_spec)
 
     # Display
     print_entity_table("Entity-spec (primary path)", primary)
@@ -24,9 +24,12 @@ Usage::
 from __future__ import annotations
 
 import asyncio
+import functools
+import gzip
 import html
 import logging
 import secrets
+import socket
 from typing import Any
 
 logger = logging.getLogger(__name__)
@@ -56,41 +59,9 @@ _ERROR = "#F50057"
 _BULMA_CDN = "https://cdn.jsdelivr.net/npm/bulma@1.0.4/css/bulma.min.css"
 _LATO_CDN = "https://fonts.googleapis.com/css2?family=Lato:wght@300;400;700;900&family=Open+Sans:wght@400;600&display=swap"
 
-
-def _render_approval_page(
-    title: str,
-    message: str,
-    details: dict[str, Any],
-    nonce: str,
-    action_url: str,
-) -> str:
-    """Render the approval HTML page with Plainsight branding + Bulma CSS."""
-
-    # Build the details table rows
-    detail_rows = []
-    for key, value in details.items():
-        if isinstance(value, list):
-            codes = " ".join(f'<code>{html.escape(str(v))}</code>' for v in value)
-            detail_rows.append(
-                f'<tr><th>{html.escape(key)}</th>'
-                f'<td>{codes}</td></tr>'
-            )
-        else:
-            detail_rows.append(
-                f'<tr><th>{html.escape(key)}</th>'
-                f'<td><code>{html.escape(str(value))}</code></td></tr>'
-            )
-    details_html = "\n".join(detail_rows)
-
-    return f"""\
-<!DOCTYPE html>
-<html lang="en">
-<head>
-  <meta charset="utf-8">
-  <meta name="viewport" content="width=device-width, initial-scale=1">
-  <title>{html.escape(title)} — Plainsight</title>
-  <link rel="stylesheet" href="{_BULMA_CDN}">
-  <link rel="stylesheet" href="{_LATO_CDN}">
+# The approval page's stylesheet depends only on the constants above, so it is
+# formatted once here instead of for every session
+_APPROVAL_STYLE = f"""\
   <style>
     *,*::before,*::after {{ box-sizing: border-box; }}
     body {{
@@ -225,27 +196,61 @@ def _render_approval_page(
       border-top: 1px solid rgba(90, 127, 132, 0.3);
     }}
   </style>
-</head>
+"""
+
+
+# html.escape's chained str.replace calls run in C and beat a str.translate
+# table several times over, since translate maps each character through a dict
+@functools.lru_cache(maxsize=256)
+def _escape(text: str) -> str:
+    """``html.escape`` memoized; detail keys and scope names repeat across sessions."""
+    return html.escape(text)
+
+
+def _detail_cell(value: Any) -> str:
+    """Render a details value as ``<code>`` elements, one per list item."""
+    if isinstance(value, list):
+        return " ".join(f"<code>{_escape(str(v))}</code>" for v in value)
+    return f"<code>{_escape(str(value))}</code>"
+
+
+# Marks where _render_approval_page fills in per-session values; never in the page itself
+_SLOT = "\0"
+
+# The approval page split at its per-session fields. Everything static, colors
+# and stylesheet included, is formatted once here; a render only joins the
+# segments with the escaped values, in this order: title, title, message,
+# details rows, then action URL and nonce for each of the two forms.
+_APPROVAL_SEGMENTS = f"""\
+<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="utf-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1">
+  <title>{_SLOT} — Plainsight</title>
+  <link rel="stylesheet" href="{_BULMA_CDN}">
+  <link rel="stylesheet" href="{_LATO_CDN}">
+{_APPROVAL_STYLE}</head>
 <body>
   <div class="approval-card" id="card">
     <div class="card-header-banner">
-      <h1>{html.escape(title)}</h1>
+      <h1>{_SLOT}</h1>
       <div class="subtitle">OpenFilter MCP &middot; Token Approval</div>
     </div>
     <div class="card-body">
-      <p class="message-text">{html.escape(message)}</p>
+      <p class="message-text">{_SLOT}</p>
       <table class="detail-table">
-        {details_html}
+        {_SLOT}
       </table>
     </div>
     <div class="card-footer-bar">
-      <form method="POST" action="{html.escape(action_url)}" style="display:inline">
-        <input type="hidden" name="nonce" value="{html.escape(nonce)}">
+      <form method="POST" action="{_SLOT}" style="display:inline">
+        <input type="hidden" name="nonce" value="{_SLOT}">
         <input type="hidden" name="action" value="deny">
         <button type="submit" class="button is-medium btn-deny">Deny</button>
       </form>
-      <form method="POST" action="{html.escape(action_url)}" style="display:inline">
-        <input type="hidden" name="nonce" value="{html.escape(nonce)}">
+      <form method="POST" action="{_SLOT}" style="display:inline">
+        <input type="hidden" name="nonce" value="{_SLOT}">
         <input type="hidden" name="action" value="approve">
         <button type="submit" class="button is-medium btn-approve">Approve</button>
       </form>
@@ -256,7 +261,42 @@ def _render_approval_page(
     </div>
   </div>
 </body>
-</html>"""
+</html>""".split(_SLOT)
+
+
+def _render_approval_page(
+    title: str,
+    message: str,
+    details: dict[str, Any],
+    nonce: str,
+    action_url: str,
+) -> str:
+    """Render the approval HTML page with Plainsight branding + Bulma CSS."""
+
+    # Build the details table rows
+    details_html = "\n".join(
+        f"<tr><th>{_escape(key)}</th><td>{_detail_cell(value)}</td></tr>"
+        for key, value in details.items()
+    )
+    title_html = _escape(title)
+    action_attr = _escape(action_url)
+    nonce_attr = _escape(nonce)
+
+    values = (
+        title_html,
+        title_html,
+        _escape(message),
+        details_html,
+        action_attr,
+        nonce_attr,
+        action_attr,
+        nonce_attr,
+    )
+    parts = [_APPROVAL_SEGMENTS[0]]
+    for value, segment in zip(values, _APPROVAL_SEGMENTS[1:]):
+        parts.append(value)
+        parts.append(segment)
+    return "".join(parts)
 
 
 def _render_response_page(action: str) -> str:
@@ -344,6 +384,55 @@ def _render_response_page(action: str) -> str:
 </html>"""
 
 
+# The approval form posts two short fields; anything much larger is not ours
+_MAX_FORM_FIELDS = 4
+_MAX_FORM_BYTES = 256
+
+
+def _parse_approval_form(body: bytes) -> tuple[str, str] | None:
+    """Extract ``(nonce, action)`` from an urlencoded approval form body.
+
+    Both values are URL-safe ASCII by construction (the nonce comes from
+    ``secrets.token_urlsafe``), so the body is split directly without
+    percent-decoding, and a value that needed escaping simply won't match.
+    Returns None for bodies over ``_MAX_FORM_BYTES`` or with more than
+    ``_MAX_FORM_FIELDS`` fields.
+    """
+    if len(body) > _MAX_FORM_BYTES:
+        return None
+    fields = body.split(b"&")
+    if len(fields) > _MAX_FORM_FIELDS:
+        return None
+    params: dict[bytes, bytes] = {}
+    for field in fields:
+        key, _, value = field.partition(b"=")
+        if value:  # blank values are dropped, as with parse_qs
+            params.setdefault(key, value)  # first occurrence wins
+    nonce = params.get(b"nonce", b"").decode("utf-8", errors="replace")
+    action = params.get(b"action", b"deny").decode("utf-8", errors="replace")
+    return nonce, action
+
+
+def _gzip(body: bytes) -> bytes:
+    """Compress a page for clients that accept gzip; the CSS-heavy pages shrink ~3x.
+
+    Each page is compressed once and served many times, and at a few KB the
+    strongest level costs no more than the default, so use it.
+    """
+    return gzip.compress(body, compresslevel=9, mtime=0)
+
+
+# Headers for a page served pre-compressed
+_GZIP_HEADERS = {"Content-Encoding": "gzip", "Vary": "Accept-Encoding"}
+
+# Only a handful of confirmation pages exist; encode and compress each once at import
+_RESPONSE_PAGES = {
+    action: _render_response_page(action).encode("utf-8")
+    for action in ("approve", "deny", "timeout")
+}
+_RESPONSE_PAGES_GZIP = {action: _gzip(page) for action, page in _RESPONSE_PAGES.items()}
+
+
 # ============================================================================
 # ApprovalSession — handle for a pending approval
 # ============================================================================
@@ -357,32 +446,31 @@ class ApprovalSession:
         session_id: Unique identifier for this approval session.
     """
 
+    __slots__ = ("url", "session_id", "_future", "_timeout", "_on_timeout", "_timeout_handle")
+
     def __init__(self, url: str, session_id: str, future: asyncio.Future[str], timeout: int):
         self.url = url
         self.session_id = session_id
         self._future = future
         self._timeout = timeout
         self._on_timeout: list[callable] = []
-        self._timeout_task = asyncio.create_task(self._auto_timeout())
+        # A timer rather than a sleeping task: no coroutine frame or Task per session
+        self._timeout_handle = asyncio.get_running_loop().call_later(timeout, self._expire)
 
     def add_timeout_callback(self, callback: callable) -> None:
         """Register a callback to invoke when the session times out."""
         self._on_timeout.append(callback)
 
-    async def _auto_timeout(self):
-        """Resolve the future with "timeout" after the deadline."""
-        try:
-            await asyncio.sleep(self._timeout)
-            if not self._future.done():
-                self._future.set_result("timeout")
-                logger.info("Approval session %s timed out", self.session_id)
-                for cb in self._on_timeout:
-                    try:
-                        cb()
-                    except Exception:
-                        logger.exception("Error in approval timeout callback")
-        except asyncio.CancelledError:
-            pass
+    def _expire(self) -> None:
+        """Resolve the future with "timeout" once the deadline passes."""
+        if not self._future.done():
+            self._future.set_result("timeout")
+            logger.info("Approval session %s timed out", self.session_id)
+            for cb in self._on_timeout:
+                try:
+                    cb()
+                except Exception:
+                    logger.exception("Error in approval timeout callback")
 
     async def wait(self) -> str:
         """Block until the user responds or the timeout expires.
@@ -393,7 +481,7 @@ class ApprovalSession:
         try:
             result = await self._future
         finally:
-            self._timeout_task.cancel()
+            self._timeout_handle.cancel()
         logger.info("Approval session %s resolved: %s", self.session_id, result)
         return result
 
@@ -401,7 +489,7 @@ class ApprovalSession:
         """Cancel this session, resolving the future with *result*."""
         if not self._future.done():
             self._future.set_result(result)
-        self._timeout_task.cancel()
+        self._timeout_handle.cancel()
 
 
 # ============================================================================
@@ -418,7 +506,7 @@ class ApprovalRegistry:
     """
 
     def __init__(self):
-        # session_id → {nonce, future, html_bytes}
+        # session_id → {nonce, future, html_bytes, html_gzip}
         self._sessions: dict[str, dict[str, Any]] = {}
 
     def create_session(
@@ -452,10 +540,12 @@ class ApprovalRegistry:
 
         approval_html = _render_approval_page(title, message, details, nonce, action_url)
 
+        html_bytes = approval_html.encode("utf-8")
         self._sessions[session_id] = {
             "nonce": nonce,
             "future": future,
-            "html_bytes": approval_html.encode("utf-8"),
+            "html_bytes": html_bytes,
+            "html_gzip": _gzip(html_bytes),
         }
 
         session = ApprovalSession(page_url, session_id, future, timeout_seconds)
@@ -470,10 +560,16 @@ class ApprovalRegistry:
         logger.info("Approval session created: %s → %s", session_id, page_url)
         return session
 
-    def get_session_html(self, session_id: str) -> bytes | None:
-        """Get the pre-rendered approval page HTML for a session."""
+    def pending_count(self) -> int:
+        """Number of sessions still awaiting a response."""
+        return len(self._sessions)
+
+    def get_session_html(self, session_id: str, compressed: bool = False) -> bytes | None:
+        """Get the pre-rendered approval page HTML for a session, gzipped if *compressed*."""
         entry = self._sessions.get(session_id)
-        return entry["html_bytes"] if entry else None
+        if not entry:
+            return None
+        return entry["html_gzip"] if compressed else entry["html_bytes"]
 
     def submit_response(self, session_id: str, nonce: str, action: str) -> str | None:
         """Submit an approve/deny response for a session.
@@ -484,7 +580,8 @@ class ApprovalRegistry:
         entry = self._sessions.get(session_id)
         if not entry:
             return None
-        if entry["nonce"] != nonce:
+        # Constant-time, on bytes: compare_digest rejects non-ASCII str input
+        if not secrets.compare_digest(entry["nonce"].encode(), nonce.encode()):
             return None
         if action not in ("approve", "deny"):
             return None
@@ -512,35 +609,37 @@ def register_approval_routes(mcp) -> ApprovalRegistry:
 
     registry = ApprovalRegistry()
 
+    def accepts_gzip(request: Request) -> bool:
+        return "gzip" in request.headers.get("accept-encoding", "")
+
+    def response_page(request: Request, action: str, status_code: int = 200) -> HTMLResponse:
+        if accepts_gzip(request):
+            return HTMLResponse(
+                _RESPONSE_PAGES_GZIP[action], status_code=status_code, headers=_GZIP_HEADERS
+            )
+        return HTMLResponse(_RESPONSE_PAGES[action], status_code=status_code)
+
     @mcp.custom_route("/approve/{session_id}", methods=["GET"])
     async def approval_page(request: Request) -> HTMLResponse:
         session_id = request.path_params["session_id"]
-        html_bytes = registry.get_session_html(session_id)
+        compressed = accepts_gzip(request)
+        html_bytes = registry.get_session_html(session_id, compressed=compressed)
         if html_bytes is None:
-            return HTMLResponse(
-                _render_response_page("timeout"),
-                status_code=404,
-            )
-        return HTMLResponse(html_bytes)
+            return response_page(request, "timeout", status_code=404)
+        return HTMLResponse(html_bytes, headers=_GZIP_HEADERS if compressed else None)
 
     @mcp.custom_route("/approve/{session_id}/respond", methods=["POST"])
     async def approval_respond(request: Request) -> HTMLResponse:
         session_id = request.path_params["session_id"]
-        body = await request.body()
-        from urllib.parse import parse_qs
-        params = parse_qs(body.decode("utf-8", errors="replace"))
-
-        submitted_nonce = params.get("nonce", [""])[0]
-        action = params.get("action", ["deny"])[0]
-
-        result = registry.submit_response(session_id, submitted_nonce, action)
+        form = _parse_approval_form(await request.body())
+        result = None
+        if form is not None:
+            submitted_nonce, action = form
+            result = registry.submit_response(session_id, submitted_nonce, action)
         if result is None:
-            return HTMLResponse(
-                _render_response_page("timeout"),
-                status_code=403,
-            )
+            return response_page(request, "timeout", status_code=403)
 
-        return HTMLResponse(_render_response_page(action))
+        return response_page(request, action)
 
     return registry
 
@@ -550,118 +649,390 @@ def register_approval_routes(mcp) -> ApprovalRegistry:
 # ============================================================================
 
 
+def _make_listen_socket() -> socket.socket:
+    """Bind a loopback listening socket on a free port.
+
+    Binding once and handing the socket to asyncio means no other process can
+    take the port between picking it and listening on it.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", 0))
+    sock.setblocking(False)
+    sock.listen(16)
+    return sock
+
+
+class _StandaloneServer:
+    """One loopback HTTP server shared by every standalone approval session.
+
+    Started on first use and kept listening while sessions keep arriving, so
+    each session only adds a registry entry instead of binding, accepting on
+    and tearing down its own port. Once no session has been pending for
+    ``_STANDALONE_IDLE_SECONDS`` the port is released; the next session
+    starts a new listener. The listener never outlives its event loop: it is
+    closed when the loop shuts down while idle, and a session arriving on a
+    different loop replaces it. Pages are routed by session id exactly like the
+    FastMCP routes (``/approve/<session_id>`` and ``/approve/<session_id>/respond``).
+    """
+
+    def __init__(self):
+        self.registry = ApprovalRegistry()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._starting: asyncio.Task | None = None
+        # Pre-bound listening socket, owned by the server once _starting creates it
+        self._sock: socket.socket | None = None
+        self._base_url = ""
+        self._idle_close: asyncio.Task | None = None
+
+    async def create_session(
+        self, title: str, message: str, details: dict[str, Any], timeout_seconds: int
+    ) -> ApprovalSession:
+        """Register a new approval session, starting the server if needed."""
+        base_url = await self.start()
+        session = self.registry.create_session(
+            title, message, details, timeout_seconds=timeout_seconds, base_url=base_url
+        )
+        # Added after the registry's own callback, which drops the session entry
+        session._future.add_done_callback(self._session_done)
+        return session
+
+    async def start(self) -> str:
+        """Start listening if not already, returning the server's base URL."""
+        loop = asyncio.get_running_loop()
+        idle_close, self._idle_close = self._idle_close, None
+        if idle_close is not None and not idle_close.get_loop().is_closed():
+            idle_close.cancel()
+        if self._loop is not loop:
+            # A server belongs to the loop it was started on; a new loop
+            # (e.g. a later asyncio.run) gets a fresh one
+            self._close()
+            self._sock = sock = _make_listen_socket()
+            self._loop = loop
+            self._base_url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+            self._starting = loop.create_task(
+                loop.create_server(lambda: _ApprovalProtocol(self), sock=sock)
+            )
+            logger.info("Standalone approval server listening on %s", self._base_url)
+        try:
+            # Shielded so a caller cancelled mid-startup doesn't abort it for the others
+            await asyncio.shield(self._starting)
+        except Exception:
+            self._loop = None  # let the next call retry
+            raise
+        return self._base_url
+
+    def _session_done(self, _future: asyncio.Future) -> None:
+        if (
+            not self.registry.pending_count()
+            and self._idle_close is None
+            and self._loop is not None
+            and not self._loop.is_closed()
+        ):
+            self._idle_close = self._loop.create_task(self._close_when_idle())
+
+    async def _close_when_idle(self) -> None:
+        try:
+            await asyncio.sleep(_STANDALONE_IDLE_SECONDS)
+        finally:
+            # Also reached when the loop shuts down (asyncio.run cancels every
+            # remaining task); start() withdraws the task before cancelling it,
+            # and no other idle task is created while this one is registered
+            if self._idle_close is not None:
+                self._idle_close = None
+                if not self.registry.pending_count():
+                    self._close()
+
+    def _close(self) -> None:
+        """Stop listening, or abandon a startup that never produced a server."""
+        starting, self._starting = self._starting, None
+        sock, self._sock = self._sock, None
+        self._loop = None
+        if starting is None:
+            return
+        if starting.done() and not starting.cancelled() and starting.exception() is None:
+            starting.result().close()  # closes the socket with it
+            logger.info("Standalone approval server on %s closed", self._base_url)
+            return
+        # Still starting, or cancelled/failed (e.g. its loop was torn down first).
+        # A task on a closed loop can't be cancelled, and will never run again.
+        if not starting.done() and not starting.get_loop().is_closed():
+            starting.cancel()
+        sock.close()
+
+    def _respond(
+        self,
+        transport: asyncio.WriteTransport,
+        method: bytes,
+        path: bytes,
+        version: list[bytes],
+        headers: dict[bytes, bytes],
+        body: bytes,
+    ) -> bool:
+        """Answer one parsed request; returns whether to keep the connection open."""
+        gzip_ok = b"gzip" in headers.get(b"accept-encoding", b"")
+        keep_alive = version == [b"HTTP/1.1"] and headers.get(b"connection") != b"close"
+
+        # "/approve/<session_id>" or "/approve/<session_id>/respond"
+        parts = path.split(b"/")
+        session_id = parts[2] if len(parts) in (3, 4) and parts[1] == b"approve" else b""
+        subpath = parts[3] if len(parts) == 4 else None
+        if path == b"/favicon.ico":
+            # Browsers ask for it alongside every page; there is none
+            _send_no_content(transport, keep_alive)
+
+        elif not session_id:
+            _send_response(transport, 404, "text/plain", b"Not found", keep_alive)
+
+        elif method in (b"GET", b"HEAD") and subpath is None:
+            head_only = method == b"HEAD"
+            html_bytes = self.registry.get_session_html(
+                session_id.decode("ascii", errors="replace"), compressed=gzip_ok
+            )
+            if html_bytes is not None:
+                encoding = "gzip" if gzip_ok else None
+                _send_response(
+                    transport, 200, "text/html", html_bytes, keep_alive, encoding, head_only
+                )
+            else:
+                self._send_page(transport, 404, "timeout", gzip_ok, keep_alive, head_only)
+
+        elif method == b"POST" and subpath == b"respond":
+            form = _parse_approval_form(body)
+            result = None
+            if form is not None:
+                submitted_nonce, action = form
+                result = self.registry.submit_response(
+                    session_id.decode("ascii", errors="replace"), submitted_nonce, action
+                )
+            if result is None:
+                self._send_page(transport, 403, "timeout", gzip_ok, keep_alive)
+            else:
+                # The session is over; nothing more will be served
+                keep_alive = False
+                self._send_page(transport, 200, result, gzip_ok)
+
+        else:
+            _send_response(transport, 404, "text/plain", b"Not found", keep_alive)
+
+        return keep_alive
+
+    @staticmethod
+    def _send_page(
+        transport: asyncio.WriteTransport,
+        status: int,
+        action: str,
+        gzip_ok: bool,
+        keep_alive: bool = False,
+        head_only: bool = False,
+    ):
+        if gzip_ok:
+            page, encoding = _RESPONSE_PAGES_GZIP[action], "gzip"
+        else:
+            page, encoding = _RESPONSE_PAGES[action], None
+        _send_response(transport, status, "text/html", page, keep_alive, encoding, head_only)
+
+
+class _ApprovalProtocol(asyncio.Protocol):
+    """One connection to the standalone approval server.
+
+    A bare protocol rather than asyncio streams: requests are a few hundred
+    bytes, so buffering them here and answering synchronously spares each
+    connection a StreamReader, a StreamWriter and a handler task. A timer
+    bounds each request, head and body, and the idle gap between keep-alive
+    requests.
+    """
+
+    def __init__(self, server: _StandaloneServer):
+        self._server = server
+        self._transport: asyncio.Transport | None = None
+        self._buffer = bytearray()
+        self._deadline: asyncio.TimerHandle | None = None
+
+    def connection_made(self, transport: asyncio.Transport) -> None:
+        self._transport = transport
+        self._set_deadline(_FIRST_REQUEST_TIMEOUT)
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        if self._deadline is not None:
+            self._deadline.cancel()
+
+    def _set_deadline(self, seconds: float) -> None:
+        if self._deadline is not None:
+            self._deadline.cancel()
+        # Client went idle or stalled mid-request; nothing is owed, close quietly
+        self._deadline = asyncio.get_running_loop().call_later(seconds, self._transport.close)
+
+    def data_received(self, data: bytes) -> None:
+        self._buffer += data
+        transport = self._transport
+        # Loop, as a client may pipeline several requests into one read
+        while not transport.is_closing():
+            head_end = self._buffer.find(b"\r\n\r\n", 0, _MAX_HEAD_BYTES + 4)
+            if head_end < 0:
+                if len(self._buffer) > _MAX_HEAD_BYTES:
+                    transport.abort()  # head too long to be ours
+                return
+            try:
+                method, path, version, headers = _parse_head(bytes(self._buffer[:head_end]))
+                content_length = max(int(headers.get(b"content-length", 0)), 0)
+            except ValueError:
+                logger.debug("Malformed approval HTTP request", exc_info=True)
+                transport.abort()
+                return
+            if content_length > _MAX_BODY_BYTES:
+                # Too large to be an approval form; the unread bytes would
+                # desync the connection, so close it
+                _send_response(transport, 413, "text/plain", b"Payload too large")
+                transport.close()
+                return
+
+            body_end = head_end + 4 + content_length
+            if len(self._buffer) < body_end:
+                return  # rest of the body is still on its way
+            body = bytes(self._buffer[head_end + 4 : body_end])
+            del self._buffer[:body_end]
+
+            try:
+                keep_alive = self._server._respond(transport, method, path, version, headers, body)
+            except Exception:
+                logger.debug("Error handling approval HTTP connection", exc_info=True)
+                transport.abort()
+                return
+            if not keep_alive:
+                transport.close()
+                return
+            self._set_deadline(_KEEP_ALIVE_TIMEOUT)
+
+
+_standalone_server = _StandaloneServer()
+
+
 async def start_approval_server(
     title: str,
     message: str,
     details: dict[str, Any],
     timeout_seconds: int = 120,
 ) -> ApprovalSession:
-    """Legacy entry point — spins up a standalone TCP server.
+    """Legacy entry point — serves the approval page from a standalone TCP server.
 
     Prefer :func:`register_approval_routes` + ``registry.create_session()``
     for production use (works inside Docker).  This function is kept for
     backwards compatibility with tests that don't have a FastMCP server.
+    All sessions share one loopback server, started on the first call.
     """
-    import socket
-    from urllib.parse import parse_qs
+    return await _standalone_server.create_session(title, message, details, timeout_seconds)
 
-    def _find_free_port() -> int:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.bind(("127.0.0.1", 0))
-            return s.getsockname()[1]
 
-    session_id = secrets.token_urlsafe(12)
-    nonce = secrets.token_urlsafe(16)
-    port = _find_free_port()
-    result_future: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+# Time a new connection to the standalone server has to send its first request
+_FIRST_REQUEST_TIMEOUT = 10
+# Idle time the standalone server keeps a connection open for the next request
+_KEEP_ALIVE_TIMEOUT = 5
+# Bodies below this are copied into one buffer with their headers before writing
+_SINGLE_WRITE_MAX_BODY = 7500
+# Time the standalone server keeps listening after its last session resolves
+_STANDALONE_IDLE_SECONDS = 30
+# Largest request head the standalone server reads; longer ones drop the connection
+_MAX_HEAD_BYTES = 16384
+# Largest request body the standalone server reads; the approval form is far smaller
+_MAX_BODY_BYTES = 1024
 
-    action_url = "/respond"
-    approval_html = _render_approval_page(title, message, details, nonce, action_url)
-    approval_bytes = approval_html.encode()
 
-    async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
-        try:
-            request_line = await asyncio.wait_for(reader.readline(), timeout=10)
-            if not request_line:
-                writer.close()
-                return
+def _parse_head(head: bytes) -> tuple[bytes, bytes, list[bytes], dict[bytes, bytes]]:
+    """Split a request head (without its blank line) into ``(method, path, version, headers)``.
 
-            request_str = request_line.decode("utf-8", errors="replace")
-            method, path, *_ = request_str.split()
-
-            content_length = 0
-            while True:
-                header_line = await asyncio.wait_for(reader.readline(), timeout=10)
-                if header_line in (b"\r\n", b"\n", b""):
-                    break
-                if header_line.lower().startswith(b"content-length:"):
-                    content_length = int(header_line.split(b":")[1].strip())
-
-            if method == "GET" and path == "/":
-                _send_response(writer, 200, "text/html", approval_bytes)
-
-            elif method == "POST" and path == "/respond":
-                body = b""
-                if content_length > 0:
-                    body = await asyncio.wait_for(reader.read(content_length), timeout=10)
-                params = parse_qs(body.decode("utf-8", errors="replace"))
-
-                submitted_nonce = params.get("nonce", [""])[0]
-                action = params.get("action", ["deny"])[0]
-
-                if submitted_nonce != nonce:
-                    _send_response(writer, 403, "text/plain", b"Invalid nonce")
-                elif action not in ("approve", "deny"):
-                    _send_response(writer, 400, "text/plain", b"Invalid action")
-                else:
-                    response_html = _render_response_page(action).encode()
-                    _send_response(writer, 200, "text/html", response_html)
-                    if not result_future.done():
-                        result_future.set_result(action)
-            else:
-                _send_response(writer, 404, "text/plain", b"Not found")
+    Everything stays bytes: routing only compares against a few constants,
+    so the request line is never decoded. Raises ValueError for a request
+    line without a method and path.
+    """
+    request_line, _, header_blob = head.partition(b"\r\n")
+    method, path, *version = request_line.split()
+    return method, path, version, _parse_headers(header_blob)
 
-            await writer.drain()
-        except Exception:
-            logger.debug("Error handling approval HTTP connection", exc_info=True)
-        finally:
-            try:
-                writer.close()
-                await writer.wait_closed()
-            except Exception:
-                pass
 
-    server = await asyncio.start_server(handle_connection, "127.0.0.1", port)
-    url = f"http://127.0.0.1:{port}/"
-    logger.info("Standalone approval server listening on %s", url)
+def _parse_headers(header_blob: bytes) -> dict[bytes, bytes]:
+    """Map lowercased header names to values for a raw CRLF-separated header block.
 
-    class _StandaloneSession(ApprovalSession):
-        """ApprovalSession that also shuts down the standalone TCP server."""
-        def __init__(self, url, sid, future, timeout, tcp_server):
-            super().__init__(url, sid, future, timeout)
-            self._server = tcp_server
+    The block is lowercased in one call; the headers the server reads
+    (Content-Length, Connection) compare case-insensitively anyway.
+    """
+    headers = {}
+    for line in header_blob.lower().split(b"\r\n"):
+        name, _, value = line.partition(b":")
+        headers[name.strip()] = value.strip()
+    return headers
 
-        async def wait(self) -> str:
-            try:
-                result = await self._future
-            finally:
-                self._timeout_task.cancel()
-                self._server.close()
-                await self._server.wait_closed()
-            logger.info("Standalone approval server shut down (result: %s)", result)
-            return result
-
-    return _StandaloneSession(url, session_id, result_future, timeout_seconds, server)
-
-
-def _send_response(writer: asyncio.StreamWriter, status: int, content_type: str, body: bytes):
-    """Write a minimal HTTP/1.1 response."""
-    reason = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found"}.get(status, "OK")
-    headers = (
-        f"HTTP/1.1 {status} {reason}\r\n"
-        f"Content-Type: {content_type}; charset=utf-8\r\n"
-        f"Content-Length: {len(body)}\r\n"
-        f"Connection: close\r\n"
-        f"\r\n"
+
+@functools.lru_cache(maxsize=None)
+def _response_head(
+    status: int, content_type: str, keep_alive: bool, encoding: str | None
+) -> tuple[bytes, bytes]:
+    """Encoded header lines before and after Content-Length for one kind of response.
+
+    The server sends only a handful of (status, type, connection, encoding)
+    combinations, so each is formatted and encoded once.
+    """
+    reason = {
+        200: "OK",
+        204: "No Content",
+        400: "Bad Request",
+        403: "Forbidden",
+        404: "Not Found",
+        413: "Payload Too Large",
+    }.get(status, "OK")
+    connection = _connection_header(keep_alive)
+    encoding_headers = (
+        f"Content-Encoding: {encoding}\r\nVary: Accept-Encoding\r\n" if encoding else ""
     )
-    writer.write(headers.encode() + body)
+    before = f"HTTP/1.1 {status} {reason}\r\nContent-Type: {content_type}; charset=utf-8\r\n"
+    after = f"{encoding_headers}{connection}\r\n"
+    return before.encode("ascii"), after.encode("ascii")
+
+
+def _send_response(
+    transport: asyncio.WriteTransport,
+    status: int,
+    content_type: str,
+    body: bytes,
+    keep_alive: bool = False,
+    encoding: str | None = None,
+    head_only: bool = False,
+):
+    """Write a minimal HTTP/1.1 response; *encoding* names a pre-applied Content-Encoding.
+
+    Only the Content-Length line is formatted per response. A small response
+    is joined into one buffer and written at once, so it leaves in a single
+    send; a larger body is handed over alongside the headers without being
+    copied. With *head_only* (a HEAD request) the headers describe *body*
+    but it is not sent.
+    """
+    before, after = _response_head(status, content_type, keep_alive, encoding)
+    length = b"Content-Length: %d\r\n" % len(body)
+    if head_only:
+        transport.write(b"".join((before, length, after)))
+    elif len(body) < _SINGLE_WRITE_MAX_BODY:
+        transport.write(b"".join((before, length, after, body)))
+    else:
+        transport.writelines((before, length, after, body))
+
+
+def _connection_header(keep_alive: bool) -> str:
+    """Connection header lines for a response that keeps or closes the connection."""
+    if keep_alive:
+        return f"Connection: keep-alive\r\nKeep-Alive: timeout={_KEEP_ALIVE_TIMEOUT}\r\n"
+    return "Connection: close\r\n"
+
+
+# A 204 carries no Content-Type or Content-Length; browsers cache it for a day
+_NO_CONTENT_RESPONSES = {
+    keep_alive: (
+        "HTTP/1.1 204 No Content\r\nCache-Control: max-age=86400\r\n"
+        f"{_connection_header(keep_alive)}\r\n"
+    ).encode("ascii")
+    for keep_alive in (True, False)
+}
+
+
+def _send_no_content(transport: asyncio.WriteTransport, keep_alive: bool = False):
+    """Write a pre-encoded empty 204 response."""
+    transport.write(_NO_CONTENT_RESPONSES[keep_alive])
@@ -10,14 +10,20 @@ from the psctl CLI configuration at the platform-appropriate location:
   - Windows: C:\\Users\\<user>\\AppData\\Local\\plainsight\\token
 """
 
+import asyncio
+import atexit
 import base64
+import functools
 import json
 import logging
 import os
+import threading
+import time
+import weakref
 from contextlib import asynccontextmanager, contextmanager
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, AsyncGenerator, Dict, Generator, Optional
+from typing import Any, AsyncGenerator, Dict, Generator, NamedTuple, Optional
 
 import httpx
 import platformdirs
@@ -25,8 +31,17 @@ from fastmcp.server.auth.providers.debug import DebugTokenVerifier
 
 from openfilter_mcp.redact import register_sensitive
 
+try:
+    import orjson  # pyright: ignore[reportMissingImports]
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Token files, JWT payloads and 401 bodies are parsed by orjson when it is installed.
+# Both raise a json.JSONDecodeError subclass on bad input.
+_json_loads = orjson.loads if orjson is not None else json.loads
+
 
 # Configuration
 # Default API URL for the Plainsight API
@@ -60,18 +75,47 @@ PLAINSIGHT_API_URL = get_api_url()
 PSCTL_APP_NAME = "plainsight"
 PSCTL_TOKEN_FILENAME = "token"
 
-# Cached token to avoid file I/O races in concurrent async calls
-_cached_token: Optional[str] = None
-_cached_token_expiry: Optional[datetime] = None
-_cached_token_mtime: Optional[float] = None
+
+# Tokens are refreshed, and no longer served from cache, this long before they expire
+_TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+
+
+class _CachedToken(NamedTuple):
+    """An access token with its cache deadline and the token-file mtime it was read with.
+
+    ``fresh_until`` is the token's expiry minus _TOKEN_REFRESH_MARGIN, as
+    epoch seconds so the cache check is a single time.time() comparison.
+    It is None when the token has no known expiry, which is never served
+    from cache.
+    """
+
+    token: str
+    fresh_until: Optional[float]
+    mtime: Optional[float]
+
+    @classmethod
+    def build(
+        cls, token: str, expiry: Optional[datetime], mtime: Optional[float]
+    ) -> "_CachedToken":
+        fresh_until = None
+        if expiry is not None:
+            fresh_until = (expiry - _TOKEN_REFRESH_MARGIN).timestamp()
+        return cls(token, fresh_until, mtime)
+
+
+# Cached token to avoid file I/O races in concurrent async calls. It is only
+# ever replaced whole, so a reader never pairs one token with another's expiry.
+_token_cache: Optional[_CachedToken] = None
+# Async callers read the token file from worker threads; one reader at a time,
+# so concurrent cache misses can't both spend the same refresh token
+_psctl_token_lock = threading.Lock()
 
 
 def _reset_token_cache() -> None:
     """Reset the token cache. Used for testing."""
-    global _cached_token, _cached_token_expiry, _cached_token_mtime
-    _cached_token = None
-    _cached_token_expiry = None
-    _cached_token_mtime = None
+    global _token_cache
+    _token_cache = None
+    _token_info.cache_clear()
 
 
 class AuthenticationError(Exception):
@@ -92,19 +136,17 @@ def decode_jwt_payload(token: str) -> Optional[Dict[str, Any]]:
     Returns:
         The decoded payload dict, or None if decoding fails.
     """
-    try:
-        parts = token.split(".")
-        if len(parts) != 3:
-            return None
-
-        payload = parts[1]
-        # Add padding if needed
-        padding = 4 - len(payload) % 4
-        if padding != 4:
-            payload += "=" * padding
+    # header.payload.signature — locate the payload without splitting the whole token
+    _, _, rest = token.partition(".")
+    payload, dot, signature = rest.partition(".")
+    if not dot or "." in signature:
+        return None
 
-        decoded = base64.urlsafe_b64decode(payload)
-        return json.loads(decoded)
+    try:
+        # Restore the padding JWTs strip: 0-3 "=" to reach a multiple of 4
+        decoded = base64.urlsafe_b64decode(payload + "=" * (-len(payload) & 3))
+        # Both parsers take the decoded bytes as-is; no separate UTF-8 decode
+        return _json_loads(decoded)
     except (ValueError, json.JSONDecodeError, UnicodeDecodeError):
         return None
 
@@ -130,10 +172,11 @@ def get_org_id_from_token(token: str) -> Optional[str]:
     Returns:
         The organization ID string, or None if not found.
     """
-    payload = decode_jwt_payload(token)
-    if not payload:
-        return None
+    return _token_info(token).org_id
+
 
+def _org_id_from_claims(payload: Dict[str, Any]) -> Optional[str]:
+    """Find the organization ID in decoded JWT claims (see get_org_id_from_token)."""
     # OAuth-issued tokens: flat `org_id` claim (DT-132).
     flat = payload.get("org_id")
     if flat:
@@ -152,6 +195,7 @@ def get_org_id_from_token(token: str) -> Optional[str]:
 
 # Plainsight organization identifier (email domain for employees)
 PLAINSIGHT_EMAIL_DOMAIN = "@plainsight.ai"
+_PLAINSIGHT_EMAIL_DOMAIN_LEN = len(PLAINSIGHT_EMAIL_DOMAIN)
 
 
 def is_plainsight_employee(token: str) -> bool:
@@ -166,16 +210,35 @@ def is_plainsight_employee(token: str) -> bool:
     Returns:
         True if the user is a Plainsight employee, False otherwise.
     """
+    return _token_info(token).is_employee
+
+
+class _TokenInfo(NamedTuple):
+    """The claims this module reads from a JWT, extracted once per token."""
+
+    org_id: Optional[str]
+    is_employee: bool
+
+
+@functools.lru_cache(maxsize=256)
+def _token_info(token: str) -> _TokenInfo:
+    """Decode *token* and extract its org ID and employee status.
+
+    Every API client build asks for both, so each token is decoded once
+    rather than on every lookup. The cache is bounded and cleared by
+    _reset_token_cache().
+    """
     payload = decode_jwt_payload(token)
     if not payload:
-        return False
+        return _TokenInfo(None, False)
 
-    # Check email in the token payload
+    # Check email in the token payload; only its domain-length tail is lowercased
     email = payload.get("email", "")
-    if isinstance(email, str) and email.lower().endswith(PLAINSIGHT_EMAIL_DOMAIN):
-        return True
-
-    return False
+    is_employee = (
+        isinstance(email, str)
+        and email[-_PLAINSIGHT_EMAIL_DOMAIN_LEN:].lower() == PLAINSIGHT_EMAIL_DOMAIN
+    )
+    return _TokenInfo(_org_id_from_claims(payload), is_employee)
 
 
 def get_effective_org_id(token: str, target_org_id: Optional[str] = None) -> Optional[str]:
@@ -192,9 +255,10 @@ def get_effective_org_id(token: str, target_org_id: Optional[str] = None) -> Opt
     Returns:
         The organization ID to use in X-Scope-OrgID header, or None.
     """
+    info = _token_info(token)
     if target_org_id:
         # Allow cross-tenant operations for Plainsight employees
-        if is_plainsight_employee(token):
+        if info.is_employee:
             logger.debug(
                 f"Cross-tenant access enabled: using target org {target_org_id}"
             )
@@ -206,7 +270,7 @@ def get_effective_org_id(token: str, target_org_id: Optional[str] = None) -> Opt
             )
             # Fall through to use the token's org ID
 
-    return get_org_id_from_token(token)
+    return info.org_id
 
 
 def get_psctl_token_path() -> Path:
@@ -236,7 +300,11 @@ def _refresh_token(refresh_token: str) -> Optional[Dict[str, Any]]:
         expected by psctl (flat token structure, not nested in a "token" wrapper).
     """
     try:
-        with httpx.Client(base_url=get_api_url(), timeout=30.0) as client:
+        with httpx.Client(
+            base_url=get_api_url(),
+            timeout=30.0,
+            transport=_SharedTransport(_shared_sync_pool()),
+        ) as client:
             response = client.post(
                 "/auth/token/refresh",
                 headers={"Authorization": f"Bearer {refresh_token}"},
@@ -264,7 +332,11 @@ async def _async_refresh_token(refresh_token: str) -> Optional[Dict[str, Any]]:
         if successful, None otherwise.
     """
     try:
-        async with httpx.AsyncClient(base_url=get_api_url(), timeout=30.0) as client:
+        async with httpx.AsyncClient(
+            base_url=get_api_url(),
+            timeout=30.0,
+            transport=_SharedAsyncTransport(_shared_async_pool()),
+        ) as client:
             response = await client.post(
                 "/auth/token/refresh",
                 headers={"Authorization": f"Bearer {refresh_token}"},
@@ -291,8 +363,8 @@ def _get_refresh_token_from_file() -> Optional[str]:
         return None
 
     try:
-        with open(token_path, "r") as f:
-            token_data = json.load(f)
+        with open(token_path, "rb") as f:
+            token_data = _json_loads(f.read())
 
         # Handle nested token structure
         if "token" in token_data and isinstance(token_data["token"], dict):
@@ -303,21 +375,47 @@ def _get_refresh_token_from_file() -> Optional[str]:
         return None
 
 
+# The refresh currently in progress, shared by every caller that arrives meanwhile
+_refresh_inflight: Optional["asyncio.Task[Optional[str]]"] = None
+
+
 async def refresh_and_get_new_token() -> Optional[str]:
     """Attempt to refresh the token and return the new access token.
 
     This is used for transparent token refresh on 401 errors.
     Invalidates the token cache and attempts refresh using the stored refresh token.
 
+    Concurrent calls are coalesced: when many requests hit an expired token
+    at once, the first starts the refresh and the rest await its result, so
+    the API sees one refresh request instead of one per failed request.
+
     Returns:
         The new access token string if refresh was successful, None otherwise.
     """
-    global _cached_token, _cached_token_expiry, _cached_token_mtime
+    global _refresh_inflight
+
+    loop = asyncio.get_running_loop()
+    task = _refresh_inflight
+    # A task left over from another (e.g. finished) event loop can't be awaited here
+    if task is None or task.get_loop() is not loop:
+        task = _refresh_inflight = loop.create_task(_refresh_and_get_new_token())
+        task.add_done_callback(_clear_refresh_inflight)
+    # Shielded so one cancelled caller doesn't abort the refresh for the others
+    return await asyncio.shield(task)
+
+
+def _clear_refresh_inflight(task: "asyncio.Task[Optional[str]]") -> None:
+    global _refresh_inflight
+    if _refresh_inflight is task:
+        _refresh_inflight = None
+
+
+async def _refresh_and_get_new_token() -> Optional[str]:
+    """Perform one token refresh for refresh_and_get_new_token()."""
+    global _token_cache
 
     # Clear the cache to force re-read
-    _cached_token = None
-    _cached_token_expiry = None
-    _cached_token_mtime = None
+    _token_cache = None
 
     # Get refresh token from file
     refresh_token = _get_refresh_token_from_file()
@@ -337,15 +435,14 @@ async def refresh_and_get_new_token() -> Optional[str]:
         if new_access_token:
             register_sensitive(new_access_token, label="refreshed-token")
             # Update cache with new token
-            _cached_token = new_access_token
+            expiry = None
             expiry_str = new_token_data.get("expiry")
             if expiry_str:
                 try:
-                    _cached_token_expiry = datetime.fromisoformat(
-                        expiry_str.replace("Z", "+00:00")
-                    )
+                    expiry = datetime.fromisoformat(expiry_str.replace("Z", "+00:00"))
                 except (ValueError, TypeError):
                     pass
+            _token_cache = _CachedToken.build(new_access_token, expiry, None)
             logger.debug("Token refreshed successfully")
             return new_access_token
 
@@ -368,10 +465,17 @@ def _save_token_data(token_data: Dict[str, Any]) -> bool:
     try:
         token_path = get_psctl_token_path()
         token_path.parent.mkdir(parents=True, exist_ok=True)
-        # Write with secure permissions (0600) like psctl does
-        with open(token_path, "w") as f:
-            json.dump(token_data, f)
-        # Set secure file permissions (owner read/write only)
+        # Serialized up front so the file is written in one call, narrowing the
+        # window in which a concurrent reader can see it half-written
+        content = json.dumps(token_data)
+        # Write with secure permissions (0600) like psctl does. A new file is
+        # created owner-only, so the token is never readable by others, even
+        # briefly. The file is rewritten in place rather than renamed over:
+        # in the Docker setup it is a bind mount, which can't be replaced.
+        fd = os.open(token_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        # An existing file keeps its old mode through O_CREAT; tighten it too
         os.chmod(token_path, 0o600)
         return True
     except (IOError, OSError):
@@ -391,7 +495,13 @@ def read_psctl_token() -> Optional[str]:
     Returns:
         The access token string if available and valid, None otherwise.
     """
-    global _cached_token, _cached_token_expiry, _cached_token_mtime
+    with _psctl_token_lock:
+        return _read_psctl_token()
+
+
+def _read_psctl_token() -> Optional[str]:
+    """Body of read_psctl_token(); the caller holds _psctl_token_lock."""
+    global _token_cache
 
     token_path = get_psctl_token_path()
 
@@ -402,19 +512,18 @@ def read_psctl_token() -> Optional[str]:
         current_mtime = None
 
     # Return cached token if file hasn't changed and token isn't expiring soon
-    if _cached_token and _cached_token_expiry:
-        if (
-            current_mtime == _cached_token_mtime
-            and _cached_token_expiry > datetime.now(timezone.utc) + timedelta(minutes=5)
-        ):
-            return _cached_token
+    cached = _token_cache
+    if cached is not None and cached.fresh_until is not None:
+        if current_mtime == cached.mtime and time.time() < cached.fresh_until:
+            return cached.token
 
-    if not token_path.exists():
+    # The stat above already failed if there is no token file; don't stat again
+    if current_mtime is None:
         return None
 
     try:
-        with open(token_path, "r") as f:
-            token_data = json.load(f)
+        with open(token_path, "rb") as f:
+            token_data = _json_loads(f.read())
 
         # Handle nested token structure from psctl ({"token": {"access_token": ...}})
         if "token" in token_data and isinstance(token_data["token"], dict):
@@ -432,7 +541,7 @@ def read_psctl_token() -> Optional[str]:
                 # Parse ISO format datetime
                 expiry = datetime.fromisoformat(expiry_str.replace("Z", "+00:00"))
                 # Refresh if expired or will expire within 5 minutes
-                if expiry < datetime.now(timezone.utc) + timedelta(minutes=5):
+                if expiry < datetime.now(timezone.utc) + _TOKEN_REFRESH_MARGIN:
                     # Try to refresh the token
                     refresh_token = token_data.get("refresh_token")
                     if refresh_token:
@@ -458,9 +567,7 @@ def read_psctl_token() -> Optional[str]:
                 pass
 
         # Cache the token and file mtime
-        _cached_token = access_token
-        _cached_token_expiry = expiry
-        _cached_token_mtime = current_mtime
+        _token_cache = _CachedToken.build(access_token, expiry, current_mtime)
 
         return access_token
 
@@ -515,6 +622,18 @@ def get_auth_token() -> Optional[str]:
     return token
 
 
+async def _async_get_auth_token() -> Optional[str]:
+    """get_auth_token() for async callers, keeping file I/O off the event loop.
+
+    Reading the psctl token file, and the blocking refresh request it makes
+    when the token is about to expire, run in a worker thread. An
+    OPENFILTER_TOKEN from the environment needs no I/O and is read directly.
+    """
+    if os.getenv("OPENFILTER_TOKEN"):
+        return get_auth_token()
+    return await asyncio.to_thread(get_auth_token)
+
+
 def _resolve_bootstrap_auth() -> str | None:
     """Resolve the credential to use for the /api-tokens bootstrap call.
 
@@ -566,6 +685,79 @@ def _resolve_bootstrap_auth() -> str | None:
     return None
 
 
+class _SharedTransport(httpx.BaseTransport):
+    """Forwards to a process-wide pooling client that client.close() leaves open.
+
+    Each request goes to the transport the pooling client picks for its URL,
+    so environment proxies (HTTPS_PROXY, ALL_PROXY, NO_PROXY) apply exactly
+    as they would for a plain httpx.Client.
+    """
+
+    def __init__(self, pool: httpx.Client):
+        self._pool = pool
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        return self._pool._transport_for_url(request.url).handle_request(request)
+
+
+class _SharedAsyncTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of _SharedTransport; aclose() leaves the pool open.
+
+    With *close_pool* the pool was built for this transport alone and
+    aclose() closes it too.
+    """
+
+    def __init__(self, pool: httpx.AsyncClient, close_pool: bool = False):
+        self._pool = pool
+        self._close_pool = close_pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._pool._transport_for_url(request.url).handle_async_request(request)
+
+    async def aclose(self) -> None:
+        if self._close_pool:
+            await self._pool.aclose()
+
+
+# Clients are built per call (each carries the caller's token headers), but
+# they all send through one pool, so TCP and TLS setup to the API is paid
+# once instead of on every client. The pool is itself a client, not a bare
+# transport: httpx skips the environment proxy lookup for any client given
+# an explicit transport, so the pool's own proxy mounts do the routing.
+_sync_pool: Optional[httpx.Client] = None
+# Async connections belong to the event loop that opened them: one pool per
+# loop. A pool is not closed when its loop ends; it is dropped once the loop
+# is garbage collected, and its connections are left to garbage collection.
+_async_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _shared_sync_pool() -> httpx.Client:
+    """Return the process-wide sync pool, creating it on first use."""
+    global _sync_pool
+    if _sync_pool is None:
+        _sync_pool = httpx.Client()
+        atexit.register(_sync_pool.close)
+    return _sync_pool
+
+
+def _shared_async_pool() -> Optional[httpx.AsyncClient]:
+    """Return the running event loop's pool, or None outside a running loop.
+
+    Outside a running loop there is nothing to share with; callers then give
+    their client its own transport, which closing the client closes.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    pool = _async_pools.get(loop)
+    if pool is None:
+        pool = _async_pools[loop] = httpx.AsyncClient()
+    return pool
+
+
 def get_api_client(timeout: float = 30.0) -> httpx.Client:
     """Create an HTTP client configured for plainsight-api requests.
 
@@ -598,6 +790,7 @@ def get_api_client(timeout: float = 30.0) -> httpx.Client:
         base_url=get_api_url(),
         headers=headers,
         timeout=timeout,
+        transport=_SharedTransport(_shared_sync_pool()),
     )
 
 
@@ -653,10 +846,16 @@ def get_async_api_client(timeout: float = 30.0) -> httpx.AsyncClient:
     if org_id:
         headers["X-Scope-OrgID"] = org_id
 
+    pool = _shared_async_pool()
+    if pool is None:
+        # Nothing to share; httpx builds (and aclose() closes) the client's own pool
+        return httpx.AsyncClient(base_url=get_api_url(), headers=headers, timeout=timeout)
+
     return httpx.AsyncClient(
         base_url=get_api_url(),
         headers=headers,
         timeout=timeout,
+        transport=_SharedAsyncTransport(pool),
     )
 
 
@@ -679,7 +878,7 @@ async def async_api_client(
     Raises:
         AuthenticationError: If no valid token is available.
     """
-    client = get_async_api_client_with_retry(timeout)
+    client = _async_client_with_retry(await _async_get_auth_token(), timeout)
     try:
         yield client
     finally:
@@ -707,7 +906,6 @@ class TokenRefreshTransport(httpx.AsyncBaseTransport):
         """
         self._transport = transport
         self._get_org_id = get_org_id
-        self._refresh_lock = None  # Will be initialized lazily
 
     def _is_token_expired_error(self, response: httpx.Response) -> bool:
         """Check if a 401 response indicates token expiration (vs other auth errors).
@@ -727,9 +925,14 @@ class TokenRefreshTransport(httpx.AsyncBaseTransport):
         Returns:
             True if the error indicates token expiration, False otherwise.
         """
+        # Cheap pre-check on the raw body: with no "expired" anywhere, no field
+        # can match, so bursts of other 401s skip the JSON parse entirely
+        if b"expired" not in response.content.lower():
+            return False
+
         try:
             # Read response body to check error message
-            body = response.json()
+            body = _json_loads(response.content)
 
             # Check the errors array for expiration-related messages
             errors = body.get("errors", [])
@@ -774,39 +977,38 @@ class TokenRefreshTransport(httpx.AsyncBaseTransport):
                 logger.debug("Received 401 but not due to token expiration, not refreshing")
                 return response
 
-            # Initialize lock lazily to avoid issues with event loop
-            if self._refresh_lock is None:
-                import asyncio
-                self._refresh_lock = asyncio.Lock()
-
-            async with self._refresh_lock:
-                logger.debug("Received 401 due to token expiration, attempting refresh")
-                new_token = await refresh_and_get_new_token()
-
-                if new_token:
-                    # Build new headers with refreshed token
-                    new_headers = httpx.Headers(request.headers)
-                    new_headers["Authorization"] = f"Bearer {new_token}"
-
-                    # Update org ID header if needed
-                    org_id = self._get_org_id(new_token)
-                    if org_id:
-                        new_headers["X-Scope-OrgID"] = org_id
-
-                    # Create a new request with updated headers
-                    new_request = httpx.Request(
-                        method=request.method,
-                        url=request.url,
-                        headers=new_headers,
-                        content=request.content,
-                    )
-
-                    # Retry the request
-                    logger.debug("Retrying request with refreshed token")
-                    response = await self._transport.handle_async_request(new_request)
+            # Concurrent 401s share a single refresh (see refresh_and_get_new_token)
+            logger.debug("Received 401 due to token expiration, attempting refresh")
+            new_token = await refresh_and_get_new_token()
+
+            if new_token:
+                # Build new headers with refreshed token
+                new_headers = httpx.Headers(request.headers)
+                new_headers["Authorization"] = f"Bearer {new_token}"
+
+                # Update org ID header if needed
+                org_id = self._get_org_id(new_token)
+                if org_id:
+                    new_headers["X-Scope-OrgID"] = org_id
+
+                # Create a new request with updated headers
+                new_request = httpx.Request(
+                    method=request.method,
+                    url=request.url,
+                    headers=new_headers,
+                    content=request.content,
+                )
+
+                # Retry the request
+                logger.debug("Retrying request with refreshed token")
+                response = await self._transport.handle_async_request(new_request)
 
         return response
 
+    async def aclose(self) -> None:
+        """Close the wrapped transport."""
+        await self._transport.aclose()
+
 
 def get_async_api_client_with_retry(timeout: float = 30.0) -> httpx.AsyncClient:
     """Create an async HTTP client with automatic 401 retry via token refresh.
@@ -827,7 +1029,11 @@ def get_async_api_client_with_retry(timeout: float = 30.0) -> httpx.AsyncClient:
     Raises:
         AuthenticationError: If no valid token is available.
     """
-    token = get_auth_token()
+    return _async_client_with_retry(get_auth_token(), timeout)
+
+
+def _async_client_with_retry(token: Optional[str], timeout: float) -> httpx.AsyncClient:
+    """Build the client for get_async_api_client_with_retry() from a resolved *token*."""
     if not token:
         raise AuthenticationError("No authentication token available")
 
@@ -838,10 +1044,16 @@ def get_async_api_client_with_retry(timeout: float = 30.0) -> httpx.AsyncClient:
     if org_id:
         headers["X-Scope-OrgID"] = org_id
 
-    # Create base transport wrapped with token refresh handling
-    base_transport = httpx.AsyncHTTPTransport()
+    # Wrap the shared pool with token refresh handling; closing the client
+    # closes the wrapper, which leaves the shared pool open. Outside a running
+    # loop the pool is the client's own and closes with it.
+    pool = _shared_async_pool()
+    if pool is None:
+        transport = _SharedAsyncTransport(httpx.AsyncClient(), close_pool=True)
+    else:
+        transport = _SharedAsyncTransport(pool)
     refresh_transport = TokenRefreshTransport(
-        transport=base_transport,
+        transport=transport,
         get_org_id=get_effective_org_id,
     )
 
@@ -52,7 +52,9 @@ SESSION_TOKEN_META_KEY = "scoped_api_token_meta"
 ALLOW_UNSCOPED_TOKEN = os.getenv("OPF_MCP_ALLOW_UNSCOPED_TOKEN", "").lower() in ("1", "true", "yes")
 
 
-@dataclass
+# Registries hold one EntityOperation per API operation; slots drop the
+# per-instance __dict__, which dominates their footprint on large specs
+@dataclass(slots=True)
 class EntityOperation:
     """Represents a single API operation for an entity."""
 
@@ -68,7 +70,7 @@ class EntityOperation:
     file_fields: list[str] = field(default_factory=list)  # Field names for file uploads
 
 
-@dataclass
+@dataclass(slots=True)
 class Entity:
     """Represents an API entity with its available operations."""
 
@@ -86,10 +88,22 @@ class Entity:
 class EntityRegistry:
     """Registry of all entities and their operations, built from OpenAPI spec."""
 
-    def __init__(self, openapi_spec: dict[str, Any], entity_spec: dict[str, Any] | None = None):
+    def __init__(
+        self,
+        openapi_spec: dict[str, Any],
+        entity_spec: dict[str, Any] | None = None,
+        *,
+        operation_cache: dict[tuple[str, str], dict[str, Any]] | None = None,
+    ):
+        """Build the registry from *entity_spec* if it lists entities, else from the OpenAPI paths.
+
+        *operation_cache* lets registries built from the same OpenAPI spec share
+        the schemas extracted per ``(path, method)``; see :meth:`build_pair`.
+        """
         self.spec = openapi_spec
         self.entities: dict[str, Entity] = {}
         self._component_schemas = openapi_spec.get("components", {}).get("schemas", {})
+        self._operation_cache = operation_cache if operation_cache is not None else {}
 
         if entity_spec and entity_spec.get("entities"):
             self._parse_from_entity_spec(entity_spec)
@@ -98,6 +112,38 @@ class EntityRegistry:
 
         self._build_search_index()
 
+    @classmethod
+    def build_pair(
+        cls, openapi_spec: dict[str, Any], entity_spec: dict[str, Any] | None
+    ) -> tuple[EntityRegistry, EntityRegistry]:
+        """Build ``(entity-spec registry, OpenAPI-only registry)`` from one spec.
+
+        Both registries resolve schemas for the same OpenAPI operations; they
+        share one operation cache, so each operation's request, response and
+        parameter schemas are extracted once.
+        """
+        operation_cache: dict[tuple[str, str], dict[str, Any]] = {}
+        fallback = cls(openapi_spec, operation_cache=operation_cache)
+        primary = cls(openapi_spec, entity_spec=entity_spec, operation_cache=operation_cache)
+        return primary, fallback
+
+    def _operation_details(self, path: str, method: str, operation: dict[str, Any]) -> dict[str, Any]:
+        """Schema-derived :class:`EntityOperation` fields for an OpenAPI operation, cached per (path, method)."""
+        key = (path, method)
+        details = self._operation_cache.get(key)
+        if details is None:
+            is_multipart, file_fields = self._extract_multipart_info(operation)
+            details = {
+                "request_schema": self._extract_request_schema(operation),
+                "response_schema": self._extract_response_schema(operation),
+                "path_params": self._extract_path_params(path),
+                "query_params": self._extract_query_params(operation),
+                "is_multipart": is_multipart,
+                "file_fields": file_fields,
+            }
+            self._operation_cache[key] = details
+        return details
+
     def _parse_from_entity_spec(self, entity_spec: dict[str, Any]):
         """Parse entities from the /entity-spec endpoint response, enriching with OpenAPI schemas."""
         openapi_paths = self.spec.get("paths", {})
@@ -124,23 +170,17 @@ class EntityRegistry:
                 summary = openapi_op.get("summary", openapi_op.get("description", ""))
 
                 # Extract schema details from OpenAPI spec (reuse existing methods)
-                request_schema = self._extract_request_schema(openapi_op) if openapi_op else None
-                response_schema = self._extract_response_schema(openapi_op) if openapi_op else None
-                path_params = self._extract_path_params(path)
-                query_params = self._extract_query_params(openapi_op) if openapi_op else {}
-                is_multipart, file_fields = self._extract_multipart_info(openapi_op) if openapi_op else (False, [])
+                if openapi_op:
+                    details = self._operation_details(path, method, openapi_op)
+                else:
+                    details = {"path_params": self._extract_path_params(path)}
 
                 op = EntityOperation(
                     method=method.upper(),
                     path=path,
                     operation_id=operation_id,
                     summary=summary or f"{action} {name}",
-                    request_schema=request_schema,
-                    response_schema=response_schema,
-                    path_params=path_params,
-                    query_params=query_params,
-                    is_multipart=is_multipart,
-                    file_fields=file_fields,
+                    **details,
                 )
 
                 entity.operations[action] = op
@@ -494,21 +534,13 @@ class EntityRegistry:
 
                 entity = self.entities[entity_name]
 
-                # Check for multipart/file upload
-                is_multipart, file_fields = self._extract_multipart_info(operation)
-
-                # Create operation
+                # Create operation (schemas, parameters and multipart/file upload info)
                 op = EntityOperation(
                     method=method.upper(),
                     path=path,
                     operation_id=operation_id,
                     summary=summary,
-                    request_schema=self._extract_request_schema(operation),
-                    response_schema=self._extract_response_schema(operation),
-                    path_params=self._extract_path_params(path),
-                    query_params=self._extract_query_params(operation),
-                    is_multipart=is_multipart,
-                    file_fields=file_fields,
+                    **self._operation_details(path, method, operation),
                 )
 
                 # Store operation (may overwrite if multiple paths for same op_type)
@@ -72,56 +72,60 @@ except ImportError:
     INDEXES_DIR = None  # pyright: ignore[reportConstantRedefinition]
     HAS_CODE_CONTEXT = False  # pyright: ignore[reportConstantRedefinition]
 
+# uvloop is optional; when installed, main() runs the server on it instead of
+# the default asyncio event loop
+try:
+    import uvloop  # pyright: ignore[reportMissingImports]
+except ImportError:
+    uvloop = None
+
 
 # =============================================================================
 # OpenAPI Spec Loading
 # =============================================================================
 
 
+# MCP property-name rule (^[a-zA-Z0-9_-]{1,64}$)
+_VALID_PROPERTY_NAME = re.compile(r"^[a-zA-Z0-9_-]{1,64}$")
+
+
 def sanitize_openapi_spec(spec: dict[str, Any]) -> dict[str, Any]:
     """Sanitize OpenAPI spec for MCP compatibility.
 
     Removes properties with invalid names (MCP requires ^[a-zA-Z0-9_-]{1,64}$).
+    The spec is cleaned in place rather than rebuilt, so only the few
+    offending keys are touched however large the spec is.
 
     Args:
-        spec: The raw OpenAPI specification.
+        spec: The raw OpenAPI specification; modified in place.
 
     Returns:
-        The sanitized OpenAPI specification.
+        The same specification object, sanitized.
     """
-    import re
+    valid_name = _VALID_PROPERTY_NAME.match
 
-    valid_pattern = re.compile(r"^[a-zA-Z0-9_-]{1,64}$")
-
-    def clean_schema(schema: dict[str, Any]) -> dict[str, Any]:
-        if not isinstance(schema, dict):
-            return schema
-
-        result = {}
+    def clean_schema(schema: dict[str, Any]) -> None:
         for key, value in schema.items():
             if key == "properties" and isinstance(value, dict):
                 # Filter out invalid property names (e.g., $schema)
-                result[key] = {
-                    prop_name: clean_schema(prop_value)
-                    for prop_name, prop_value in value.items()
-                    if valid_pattern.match(prop_name)
-                }
+                for prop_name in [name for name in value if not valid_name(name)]:
+                    del value[prop_name]
+                for prop_value in value.values():
+                    if isinstance(prop_value, dict):
+                        clean_schema(prop_value)
             elif key == "required" and isinstance(value, list):
                 # Filter required list to only include valid property names
-                result[key] = [r for r in value if valid_pattern.match(r)]
+                value[:] = [r for r in value if valid_name(r)]
             elif isinstance(value, dict):
-                result[key] = clean_schema(value)
+                clean_schema(value)
             elif isinstance(value, list):
-                result[key] = [
-                    clean_schema(item) if isinstance(item, dict) else item
-                    for item in value
-                ]
-            else:
-                result[key] = value
-
-        return result
+                for item in value:
+                    if isinstance(item, dict):
+                        clean_schema(item)
 
-    return clean_schema(spec)
+    if isinstance(spec, dict):
+        clean_schema(spec)
+    return spec
 
 
 def strip_schema_from_response(data: Any) -> Any:
@@ -1318,6 +1322,9 @@ def main():
     # Create server at runtime (not at import time)
     mcp = create_mcp_server()
     port = int(os.getenv("PORT", "3000"))
+    if uvloop is not None:
+        # mcp.run starts its loop through anyio, which asks the asyncio policy for it
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     mcp.run(transport="http", port=port, host="0.0.0.0")
 
 
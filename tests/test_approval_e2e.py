@@ -10,7 +10,9 @@ Requirements:
 """
 
 import asyncio
+import gc
 import os
+import warnings
 from contextlib import contextmanager
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -374,6 +376,103 @@ class TestWebFallbackTimeout:
         assert result == "timeout"
 
 
+class TestStandaloneApprovalServer:
+    """Legacy start_approval_server — sessions share one standalone server."""
+
+    async def test_sessions_share_one_server(self):
+        from openfilter_mcp.approval_server import start_approval_server
+
+        first = await start_approval_server("First", "Approve?", {}, timeout_seconds=10)
+        second = await start_approval_server("Second", "Approve?", {}, timeout_seconds=10)
+        assert first.url.rsplit("/approve/", 1)[0] == second.url.rsplit("/approve/", 1)[0]
+
+        await asyncio.gather(
+            _submit_approval(first.url, "approve"),
+            _submit_approval(second.url, "deny"),
+        )
+        assert await first.wait() == "approve"
+        assert await second.wait() == "deny"
+
+        async with httpx.AsyncClient() as http:
+            assert (await http.get(first.url)).status_code == 404
+
+    async def test_server_closes_once_idle(self, monkeypatch):
+        from openfilter_mcp import approval_server
+        from openfilter_mcp.approval_server import start_approval_server
+
+        monkeypatch.setattr(approval_server, "_STANDALONE_IDLE_SECONDS", 0)
+        session = await start_approval_server("Idle", "Approve?", {}, timeout_seconds=10)
+        await _submit_approval(session.url, "approve")
+        assert await session.wait() == "approve"
+        await asyncio.sleep(0.1)
+
+        async with httpx.AsyncClient() as http:
+            with pytest.raises(httpx.ConnectError):
+                await http.get(session.url)
+
+        # The next session brings up a fresh listener
+        second = await start_approval_server("Again", "Approve?", {}, timeout_seconds=10)
+        await _submit_approval(second.url, "deny")
+        assert await second.wait() == "deny"
+
+    async def test_listener_does_not_outlive_its_loop(self):
+        from openfilter_mcp.approval_server import start_approval_server
+
+        async def approve_one() -> str:
+            session = await start_approval_server("Loop", "Approve?", {}, timeout_seconds=10)
+            await _submit_approval(session.url, "approve")
+            assert await session.wait() == "approve"
+            return session.url.rsplit("/approve/", 1)[0]
+
+        def run_twice() -> None:
+            for _ in range(2):
+                base_url = asyncio.run(approve_one())
+                # Closed when the loop shut down, without waiting out the idle period
+                with pytest.raises(OSError):
+                    socket.create_connection(("127.0.0.1", int(base_url.rsplit(":", 1)[1])), timeout=1)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", ResourceWarning)
+            # Each asyncio.run needs a thread without a running loop
+            await asyncio.to_thread(run_twice)
+            gc.collect()
+
+    @pytest.mark.parametrize("teardown", ["asyncio.run", "loop.close"])
+    async def test_unfinished_startup_releases_its_socket(self, teardown):
+        from openfilter_mcp.approval_server import _StandaloneServer
+
+        server = _StandaloneServer()
+
+        async def begin() -> None:
+            asyncio.ensure_future(server.start())
+            await asyncio.sleep(0)
+
+        def abandon_then_restart() -> None:
+            # The first loop goes away before the server finishes starting:
+            # asyncio.run cancels the startup, a bare close() leaves it pending
+            if teardown == "asyncio.run":
+                asyncio.run(begin())
+            else:
+                loop = asyncio.new_event_loop()
+                loop.run_until_complete(begin())
+                loop.close()
+            abandoned = server._sock
+            assert abandoned is not None
+            assert server._starting.cancelled() or not server._starting.done()
+
+            async def restart() -> None:
+                await server.start()
+                server._close()
+
+            asyncio.run(restart())
+            assert abandoned.fileno() == -1
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", ResourceWarning)
+            await asyncio.to_thread(abandon_then_restart)
+            gc.collect()
+
+
 class TestWebFallbackInvalidRequestId:
     """Test 6: await_token_approval with bad request_id."""
 
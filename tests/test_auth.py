@@ -1,5 +1,6 @@
 """Tests for the authentication module."""
 
+import asyncio
 import json
 import os
 from datetime import datetime, timedelta, timezone
@@ -396,6 +397,12 @@ class TestDecodeJwtPayload:
         assert decode_jwt_payload("only.two") is None
         assert decode_jwt_payload("") is None
 
+    def test_returns_none_for_extra_segments(self):
+        """Should reject tokens with more than three segments."""
+        header, payload, signature = SAMPLE_JWT_WITH_ORG.split(".")
+        assert decode_jwt_payload(f"{header}.{payload}.{signature}.extra") is None
+        assert decode_jwt_payload(f"{header}.{payload}..") is None
+
     def test_handles_padding_correctly(self):
         """Should handle base64 padding correctly."""
         # This JWT payload decodes to {"test": "value"}
@@ -471,6 +478,197 @@ class TestApiClientWithOrgHeader:
                 await client.aclose()
 
 
+class TestAsyncApiClientTokenRead:
+    """async_api_client keeps psctl token file reads off the event loop."""
+
+    @pytest.mark.asyncio
+    async def test_reads_psctl_token_in_worker_thread(self):
+        """The psctl token should be read outside the event loop's thread."""
+        import threading
+
+        from openfilter_mcp.auth import async_api_client
+
+        loop_thread = threading.get_ident()
+        reader_threads = []
+
+        def fake_read():
+            reader_threads.append(threading.get_ident())
+            return "psctl-token"
+
+        with patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("OPENFILTER_TOKEN", None)
+            with patch("openfilter_mcp.auth.read_psctl_token", side_effect=fake_read):
+                async with async_api_client() as client:
+                    assert client.headers["Authorization"] == "Bearer psctl-token"
+
+        assert reader_threads and reader_threads[0] != loop_thread
+
+    @pytest.mark.asyncio
+    async def test_env_token_skips_psctl_read(self):
+        """OPENFILTER_TOKEN should be used without touching the token file."""
+        from openfilter_mcp.auth import async_api_client
+
+        with patch.dict(os.environ, {"OPENFILTER_TOKEN": "env-token"}):
+            with patch("openfilter_mcp.auth.read_psctl_token") as mock_psctl:
+                async with async_api_client() as client:
+                    assert client.headers["Authorization"] == "Bearer env-token"
+            mock_psctl.assert_not_called()
+
+
+@pytest.fixture
+def env_http_proxy(monkeypatch):
+    """A local HTTP proxy set as HTTP_PROXY; yields the request lines it receives.
+
+    The API URL points at an unresolvable host, so a request only succeeds
+    if it went through the proxy. The shared pools are reset so they read
+    the environment afresh.
+    """
+    import http.server
+    import threading
+
+    from openfilter_mcp import auth as auth_module
+
+    seen = []
+
+    class ProxyHandler(http.server.BaseHTTPRequestHandler):
+        def do_POST(self):
+            seen.append(f"{self.command} {self.path}")
+            body = b'{"token": {"access_token": "proxied-token"}}'
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), ProxyHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("HTTP_PROXY", f"http://127.0.0.1:{server.server_address[1]}")
+    monkeypatch.setattr(auth_module, "get_api_url", lambda: "http://api.invalid")
+    monkeypatch.setattr(auth_module, "_sync_pool", None)
+    monkeypatch.setattr(auth_module, "_async_pools", auth_module.weakref.WeakKeyDictionary())
+    try:
+        yield seen
+    finally:
+        if auth_module._sync_pool is not None:
+            auth_module._sync_pool.close()
+        server.shutdown()
+        server.server_close()
+
+
+class TestSharedConnectionPool:
+    """API clients are built per call but share one connection pool."""
+
+    def test_token_refresh_goes_through_env_proxy(self, env_http_proxy):
+        """A user behind a proxy must still be able to refresh an expired token."""
+        assert _refresh_token("refresh") == {"access_token": "proxied-token"}
+        assert env_http_proxy == ["POST http://api.invalid/auth/token/refresh"]
+
+    @pytest.mark.asyncio
+    async def test_async_token_refresh_goes_through_env_proxy(self, env_http_proxy):
+        """The async refresh should use the proxy-aware per-loop pool."""
+        from openfilter_mcp import auth as auth_module
+
+        try:
+            assert await _async_refresh_token("refresh") == {"access_token": "proxied-token"}
+        finally:
+            await auth_module._shared_async_pool().aclose()
+        assert env_http_proxy == ["POST http://api.invalid/auth/token/refresh"]
+
+    @pytest.mark.asyncio
+    async def test_async_clients_share_pool_within_loop(self):
+        """Clients on one event loop should send through the same pool."""
+        from openfilter_mcp import auth as auth_module
+
+        with patch("openfilter_mcp.auth.get_auth_token", return_value="test-token"):
+            first = get_async_api_client()
+            await first.aclose()
+            second = get_async_api_client_with_retry()
+            try:
+                pool = auth_module._shared_async_pool()
+                assert first._transport._pool is pool
+                assert second._transport._transport._pool is pool
+            finally:
+                await second.aclose()
+
+    @pytest.mark.asyncio
+    async def test_token_refresh_uses_shared_pool(self):
+        """The refresh POST should go through the loop's shared pool."""
+        from openfilter_mcp import auth as auth_module
+
+        with patch("openfilter_mcp.auth.httpx.AsyncClient") as mock_client:
+            async def async_post(*args, **kwargs):
+                return httpx.Response(200, json={"access_token": "new"})
+            mock_client.return_value.__aenter__.return_value.post = async_post
+
+            assert await auth_module._async_refresh_token("refresh") == {"access_token": "new"}
+
+        transport = mock_client.call_args.kwargs["transport"]
+        assert transport._pool is auth_module._shared_async_pool()
+
+    def test_closing_sync_client_keeps_pool_open(self):
+        """Closing a client should not close the shared pool."""
+        with patch("openfilter_mcp.auth.get_auth_token", return_value="test-token"):
+            first = get_api_client()
+            second = get_api_client()
+            pool = first._transport._pool
+            assert second._transport._pool is pool
+            with patch.object(pool, "close") as close_pool:
+                first.close()
+                second.close()
+            close_pool.assert_not_called()
+
+    def test_shared_pool_honours_env_proxy(self, monkeypatch):
+        """HTTPS_PROXY should still route API requests through the proxy."""
+        from openfilter_mcp import auth as auth_module
+
+        monkeypatch.setattr(auth_module, "_sync_pool", None)
+        with patch.dict(os.environ, {"HTTPS_PROXY": "http://proxy.example:3128"}):
+            with patch("openfilter_mcp.auth.get_auth_token", return_value="test-token"):
+                with get_api_client() as client:
+                    pool = client._transport._pool
+        try:
+            assert "https://" in {pattern.pattern for pattern in pool._mounts}
+            proxy = pool._transport_for_url(httpx.URL("https://api.prod.plainsight.tech"))
+            assert proxy is not pool._transport
+        finally:
+            pool.close()
+
+    @pytest.mark.asyncio
+    async def test_async_shared_pool_honours_env_proxy(self, monkeypatch):
+        """The per-loop async pool should pick up HTTPS_PROXY too."""
+        from openfilter_mcp import auth as auth_module
+
+        monkeypatch.setattr(auth_module, "_async_pools", auth_module.weakref.WeakKeyDictionary())
+        with patch.dict(os.environ, {"HTTPS_PROXY": "http://proxy.example:3128"}):
+            with patch("openfilter_mcp.auth.get_auth_token", return_value="test-token"):
+                async with get_async_api_client() as client:
+                    pool = client._transport._pool
+        try:
+            assert "https://" in {pattern.pattern for pattern in pool._mounts}
+        finally:
+            await pool.aclose()
+
+    def test_async_client_outside_loop_owns_its_pool(self):
+        """Without a running loop there is no shared pool; aclose() closes the client's own."""
+        from openfilter_mcp import auth as auth_module
+
+        with patch("openfilter_mcp.auth.get_auth_token", return_value="test-token"):
+            client = get_async_api_client()
+            retry_client = get_async_api_client_with_retry()
+        assert not isinstance(client._transport, auth_module._SharedAsyncTransport)
+        with patch.object(client._transport, "aclose") as close_own:
+            asyncio.run(client.aclose())
+        close_own.assert_called_once()
+        pool = retry_client._transport._transport._pool
+        with patch.object(pool, "aclose") as close_pool:
+            asyncio.run(retry_client.aclose())
+        close_pool.assert_called_once()
+
+
 class TestApiUrlConfiguration:
     """Tests for API URL configuration with psctl-compliant env vars."""
 
@@ -699,6 +897,34 @@ class TestSaveTokenData:
         file_mode = token_file.stat().st_mode & 0o777
         assert file_mode == 0o600
 
+    @pytest.mark.skipif(os.name != "posix", reason="POSIX file modes")
+    def test_new_file_is_created_owner_only(self, tmp_path):
+        """A new token file should be 0600 from creation, not only after chmod."""
+        token_file = tmp_path / "token"
+
+        old_umask = os.umask(0)
+        try:
+            with patch("openfilter_mcp.auth.get_psctl_token_path", return_value=token_file), \
+                    patch("openfilter_mcp.auth.os.chmod"):
+                assert _save_token_data({"access_token": "test-token"}) is True
+        finally:
+            os.umask(old_umask)
+
+        assert token_file.stat().st_mode & 0o777 == 0o600
+
+    @pytest.mark.skipif(os.name != "posix", reason="POSIX file modes")
+    def test_tightens_existing_file_permissions(self, tmp_path):
+        """An existing world-readable token file should end up 0600."""
+        token_file = tmp_path / "token"
+        token_file.write_text("{}")
+        token_file.chmod(0o644)
+
+        with patch("openfilter_mcp.auth.get_psctl_token_path", return_value=token_file):
+            assert _save_token_data({"access_token": "test-token"}) is True
+
+        assert token_file.stat().st_mode & 0o777 == 0o600
+        assert json.loads(token_file.read_text()) == {"access_token": "test-token"}
+
     def test_returns_false_on_permission_error(self, tmp_path):
         """Should return False when unable to write file."""
         # Use a path that will fail (e.g., root directory on Unix)
@@ -1033,8 +1259,9 @@ class TestRefreshAndGetNewToken:
         token_file.write_text(json.dumps(token_data))
 
         # Set up cached token
-        auth_module._cached_token = "cached-old-token"
-        auth_module._cached_token_expiry = datetime.now(timezone.utc) + timedelta(hours=1)
+        auth_module._token_cache = auth_module._CachedToken.build(
+            "cached-old-token", datetime.now(timezone.utc) + timedelta(hours=1), None
+        )
 
         new_expiry = datetime.now(timezone.utc) + timedelta(hours=1)
         api_response = {
@@ -1056,12 +1283,50 @@ class TestRefreshAndGetNewToken:
 
         assert new_token == "new-token"
         # Cache should be updated with new token
-        assert auth_module._cached_token == "new-token"
+        assert auth_module._token_cache.token == "new-token"
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_refresh(self):
+        """Concurrent callers should await a single in-flight refresh."""
+        import asyncio
+
+        calls = 0
+
+        async def slow_refresh():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return f"token-{calls}"
+
+        with patch("openfilter_mcp.auth._refresh_and_get_new_token", side_effect=slow_refresh):
+            results = await asyncio.gather(*(refresh_and_get_new_token() for _ in range(5)))
+            # Once it has finished, the next call refreshes again
+            later = await refresh_and_get_new_token()
+
+        assert results == ["token-1"] * 5
+        assert later == "token-2"
 
 
 class TestTokenRefreshTransport:
     """Tests for TokenRefreshTransport class."""
 
+    def test_detects_expiration_messages(self):
+        """Should treat only expiration messages as refreshable 401s."""
+        transport = TokenRefreshTransport(
+            transport=httpx.AsyncBaseTransport(), get_org_id=lambda token: None
+        )
+
+        def is_expired(**body):
+            return transport._is_token_expired_error(httpx.Response(401, json=body))
+
+        assert is_expired(errors=[{"message": "token is expired"}]) is True
+        assert is_expired(errors=["use expired token"]) is True
+        assert is_expired(detail="Token EXPIRED") is True
+        assert is_expired(errors=[{"message": "invalid signature"}]) is False
+        # "expired" outside the inspected fields doesn't count
+        assert is_expired(detail="revoked", hint="not expired") is False
+        assert transport._is_token_expired_error(httpx.Response(401, text="expired")) is False
+
     @pytest.mark.asyncio
     async def test_passes_through_successful_requests(self):
         """Should pass through requests that succeed without 401."""
@@ -1439,6 +1704,18 @@ class TestIsPlainsightEmployee:
         # The email domain check should be case-insensitive
         assert PLAINSIGHT_EMAIL_DOMAIN == "@plainsight.ai"
 
+    def test_matches_domain_in_any_case(self):
+        """Should match an uppercase domain and reject a lookalike one."""
+        import base64
+
+        def jwt_for(email):
+            encoded = base64.urlsafe_b64encode(json.dumps({"email": email}).encode())
+            return f"eyJhbGciOiJIUzI1NiJ9.{encoded.decode().rstrip('=')}.sig"
+
+        assert is_plainsight_employee(jwt_for("Dev@PlainSight.AI")) is True
+        assert is_plainsight_employee(jwt_for("dev@notplainsight.ai")) is False
+        assert is_plainsight_employee(jwt_for("plainsight.ai")) is False
+
 
 class TestGetEffectiveOrgId:
     """Tests for get_effective_org_id function (cross-tenant support)."""
@@ -1481,6 +1758,17 @@ class TestGetEffectiveOrgId:
         org_id = get_effective_org_id(plainsight_no_org_jwt, target_org_id="target-org")
         assert org_id == "target-org"
 
+    def test_decodes_each_token_once(self):
+        """Repeated lookups on one token should reuse the first decode."""
+        with patch(
+            "openfilter_mcp.auth.decode_jwt_payload", wraps=decode_jwt_payload
+        ) as decode:
+            get_effective_org_id(PLAINSIGHT_EMPLOYEE_JWT, target_org_id="target-org")
+            get_effective_org_id(PLAINSIGHT_EMPLOYEE_JWT)
+            is_plainsight_employee(PLAINSIGHT_EMPLOYEE_JWT)
+            get_org_id_from_token(PLAINSIGHT_EMPLOYEE_JWT)
+        assert decode.call_count == 1
+
 
 class TestResolveBootstrapAuth:
     """Tests for `_resolve_bootstrap_auth` — the credential precedence
@@ -1682,6 +1682,18 @@ class TestParseFromEntitySpec:
         # But schemas won't be enriched
         assert registry.entities["project"].create_schema is None
 
+    def test_build_pair_matches_separate_builds(self):
+        """build_pair should produce the same registries as two separate builds."""
+        primary, fallback = EntityRegistry.build_pair(self.OPENAPI_SPEC, self.ENTITY_SPEC)
+
+        assert primary.entities == EntityRegistry(self.OPENAPI_SPEC, entity_spec=self.ENTITY_SPEC).entities
+        assert fallback.entities == EntityRegistry(self.OPENAPI_SPEC).entities
+        # Schemas for the same OpenAPI operation are extracted once and shared
+        assert (
+            primary.entities["project"].operations["create"].request_schema
+            is fallback.entities["project"].operations["create"].request_schema
+        )
+
 
 # ---------------------------------------------------------------------------
 # Suggest entity (fuzzy matching) tests
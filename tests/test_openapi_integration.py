@@ -601,6 +601,18 @@ class TestSanitizeOpenAPISpec:
         assert "$schema" not in props
         assert "data" in props
 
+    def test_sanitize_modifies_spec_in_place(self):
+        """Should clean the given spec and return it rather than a copy."""
+        from openfilter_mcp.server import sanitize_openapi_spec
+
+        schema = {"properties": {"$schema": {}, "ok": {}}, "required": ["$schema", "ok"]}
+        spec = {"components": {"schemas": {"S": schema}}}
+        result = sanitize_openapi_spec(spec)
+
+        assert result is spec
+        assert result["components"]["schemas"]["S"] is schema
+        assert schema == {"properties": {"ok": {}}, "required": ["ok"]}
+
 
 class TestAuthEndpointFiltering:
     """Tests for auth endpoint filtering from OpenAPI tools."""